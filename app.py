@@ -1,13 +1,31 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import feedparser
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+import numpy as np
 import requests
+from scipy import sparse
+from requests.adapters import HTTPAdapter
 import json
 import os
+import bisect
+import hashlib
+import hmac
+import math
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import uuid
+from collections import Counter as StackCounter, OrderedDict, deque
 from datetime import datetime, timedelta
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
 from functools import wraps
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +36,52 @@ CORS(app)  # Enable CORS for all routes
 
 # --- Configuration ---
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY', "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")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Any OpenAI-compatible endpoint works. For load tests, run mock_groq.py and
+# point this at it (with any GROQ_API_KEY).
+GROQ_API_URL = os.environ.get('GROQ_API_URL', "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = "llama3-8b-8192"
+GROQ_TEMPERATURE = 0.3
+
+# Groq quota for the model in use. Batches are dispatched concurrently and
+# paced by a token-bucket limiter sized to these limits. The buckets live in
+# the SQLite database at GROQ_QUOTA_DB_PATH, so every worker process on the
+# host draws from the one account quota; an empty path gives each process its
+# own full quota (single-worker deployments only).
+GROQ_QUOTA_DB_PATH = os.environ.get('GROQ_QUOTA_DB_PATH', 'ratelimit.db')
+GROQ_REQUESTS_PER_MINUTE = int(os.environ.get('GROQ_REQUESTS_PER_MINUTE', 30))
+GROQ_TOKENS_PER_MINUTE = int(os.environ.get('GROQ_TOKENS_PER_MINUTE', 30000))
+GROQ_MAX_CONCURRENCY = int(os.environ.get('GROQ_MAX_CONCURRENCY', 4))
+GROQ_COMPLETION_TOKENS_ESTIMATE = 512
+
+# Model limits used to pack batch prompts: each prompt must leave room for
+# GROQ_MAX_COMPLETION_TOKENS in the context window and fit within one minute
+# of token quota.
+GROQ_CONTEXT_TOKENS = 8192
+GROQ_MAX_COMPLETION_TOKENS = 4096
+
+# The token budget above decides how many batches a /trends run needs;
+# BATCH_MAX_ARTICLES only caps the articles in one prompt (and is the upper
+# bound and default of the batch_size query parameter). Each article brings
+# its title and the first PROMPT_SUMMARY_CHARS characters of its summary.
+BATCH_MAX_ARTICLES = int(os.environ.get('BATCH_MAX_ARTICLES', 40))
+PROMPT_SUMMARY_CHARS = int(os.environ.get('PROMPT_SUMMARY_CHARS', 500))
+
+# Keep-alive connections held open to Groq per worker process.
+GROQ_POOL_SIZE = int(os.environ.get('GROQ_POOL_SIZE', GROQ_MAX_CONCURRENCY))
+
+# Circuit breaker around Groq calls. After GROQ_BREAKER_FAILURES consecutive
+# failed calls (connection errors, timeouts, non-429 error statuses) Groq
+# calls fail immediately for GROQ_BREAKER_RESET seconds, after which one probe
+# call decides whether to close it again. Its state is kept next to the quota
+# in GROQ_QUOTA_DB_PATH, so once it opens every worker fails fast; with an
+# empty path each process has its own breaker.
+GROQ_BREAKER_FAILURES = int(os.environ.get('GROQ_BREAKER_FAILURES', 5))
+GROQ_BREAKER_RESET = float(os.environ.get('GROQ_BREAKER_RESET', 60))
+
+# On-disk cache of Groq responses keyed by model, prompts and temperature.
+# Set LLM_CACHE_DIR to an empty string to disable it.
+LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', '.llm_cache')
+LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 50 * 1024 * 1024))
 
 # RSS Feeds focused on India-US News
 RSS_FEEDS = [
@@ -29,87 +92,1277 @@ RSS_FEEDS = [
     "https://www.reuters.com/news/archive/worldNews",
     "https://www.cfr.org/rss/region/south-asia",
 ]
+# A comma-separated RSS_FEEDS environment variable replaces the list above
+if os.environ.get('RSS_FEEDS'):
+    RSS_FEEDS = [url.strip() for url in os.environ['RSS_FEEDS'].split(",") if url.strip()]
+
+# Feed fetching: feeds are downloaded concurrently, each one bounded by
+# FEED_TIMEOUT and the whole fan-out bounded by FEED_DEADLINE (seconds).
+FEED_USER_AGENT = "AITrendFinder/1.0"
+FEED_FETCH_WORKERS = int(os.environ.get('FEED_FETCH_WORKERS', 6))
+FEED_TIMEOUT = float(os.environ.get('FEED_TIMEOUT', 10))
+FEED_DEADLINE = float(os.environ.get('FEED_DEADLINE', 15))
+FEED_MAX_BYTES = 5 * 1024 * 1024
+
+feed_executor = ThreadPoolExecutor(max_workers=FEED_FETCH_WORKERS, thread_name_prefix="feed-fetch")
+
+# Conditional GET state per feed URL: the last ETag / Last-Modified validators
+# and the parsed feed they belong to, reused when the server answers 304.
+feed_validators = {}
+feed_validators_lock = threading.Lock()
+
+# Background ingestion: feeds are polled every INGEST_INTERVAL seconds into an
+# in-memory store that the routes query. Set INGEST_INTERVAL=0 to fetch feeds
+# inside each request instead.
+INGEST_INTERVAL = float(os.environ.get('INGEST_INTERVAL', 300))
+ARTICLE_RETENTION_HOURS = 168
+
+# SQLite archive of ingested articles, kept across restarts so a cold start
+# can serve straight away. Set ARTICLE_ARCHIVE_PATH to an empty string to keep
+# articles in memory only.
+ARTICLE_ARCHIVE_PATH = os.environ.get('ARTICLE_ARCHIVE_PATH', 'articles.db')
+
+# /trends result cache. Entries are keyed by the request parameters plus a
+# fingerprint of the analyzed articles. TRENDS_CACHE_TTL=0 disables caching.
+TRENDS_CACHE_TTL = float(os.environ.get('TRENDS_CACHE_TTL', 900))
+TRENDS_CACHE_SIZE = int(os.environ.get('TRENDS_CACHE_SIZE', 32))
+
+# While the Groq circuit breaker is open, /trends answers with the last good
+# response for the same parameters if it is younger than TRENDS_STALE_TTL
+# seconds, or else with unconsolidated trends from stored per-article results.
+TRENDS_STALE_TTL = float(os.environ.get('TRENDS_STALE_TTL', 86400))
+
+# Cross-feed deduplication before analysis: articles are merged when their
+# canonical links match or when the SimHash fingerprints of title + summary
+# differ in at most NEAR_DUPLICATE_DISTANCE of 64 bits (-1 disables the
+# near-duplicate pass).
+NEAR_DUPLICATE_DISTANCE = int(os.environ.get('NEAR_DUPLICATE_DISTANCE', 6))
+TRACKING_QUERY_PARAMS = {'ref', 'cmp', 'ito', 'fbclid', 'gclid', 'ncid', 'ocid', 'at_medium', 'at_campaign'}
+SIMHASH_STOPWORDS = set(
+    "a an the and or of to in on at for with by from as is are was were be been has have had "
+    "it its this that after over into says said will".split()
+)
+
+# Article selection: at most MAX_ARTICLES_ANALYZED articles, within
+# ARTICLE_TOKEN_BUDGET prompt tokens, ranked by recency (halving every
+# RECENCY_HALF_LIFE_HOURS) x keyword relevance x source diversity (each
+# article already picked from a source multiplies the next one's score by
+# SOURCE_DIVERSITY_PENALTY).
+MAX_ARTICLES_ANALYZED = 30
+ARTICLE_TOKEN_BUDGET = int(os.environ.get('ARTICLE_TOKEN_BUDGET', 6000))
+RECENCY_HALF_LIFE_HOURS = 24
+SOURCE_DIVERSITY_PENALTY = 0.5
+
+# Titles returned by Groq are matched to articles by cosine similarity of
+# character 3-gram TF-IDF vectors; below the threshold a title stays unmatched.
+TITLE_MATCH_THRESHOLD = float(os.environ.get('TITLE_MATCH_THRESHOLD', 0.5))
+
+# Local relevance filter: only articles whose title or summary mentions a
+# keyword from every group (except "shared") are sent to Groq.
+# RELEVANCE_KEYWORDS_PATH may point to a JSON file of
+# {"group": ["keyword", ...]} replacing the defaults.
+# All-caps keywords (US, MEA) match case-sensitively, the rest ignore case.
+RELEVANCE_FILTER = os.environ.get('RELEVANCE_FILTER', '1') != '0'
+RELEVANCE_KEYWORDS_PATH = os.environ.get('RELEVANCE_KEYWORDS_PATH', '')
+# Terms in the "shared" group concern both countries at once (the Quad, H-1B
+# visas): they raise an article's relevance score but satisfy neither country
+# group, so an article still has to name India and the US on its own.
+RELEVANCE_SHARED_GROUP = "shared"
+DEFAULT_RELEVANCE_KEYWORDS = {
+    "india": [
+        "India", "Indian", "Indians", "New Delhi", "Delhi", "Mumbai", "Bengaluru", "Modi", "Jaishankar",
+        "Doval", "Lok Sabha", "Rajya Sabha", "BJP", "MEA", "RBI", "rupee"
+    ],
+    "us": [
+        "US", "U.S.", "USA", "United States", "America", "American", "Americans", "Washington",
+        "White House", "Pentagon", "State Department", "US Congress", "U.S. Congress", "Senate", "Biden",
+        "Trump", "Harris", "Blinken", "Rubio", "Federal Reserve"
+    ],
+    RELEVANCE_SHARED_GROUP: ["Quad", "H-1B"]
+}
+
+# Per-article analysis results are kept so that each /trends run only sends
+# articles Groq has not seen yet. INCREMENTAL_ANALYSIS=0 re-analyzes everything.
+INCREMENTAL_ANALYSIS = os.environ.get('INCREMENTAL_ANALYSIS', '1') != '0'
+ARTICLE_ANALYSIS_CACHE_SIZE = int(os.environ.get('ARTICLE_ANALYSIS_CACHE_SIZE', 5000))
+
+# Asynchronous /trends/jobs: jobs run on a small executor inside the worker
+# process that accepted them and are kept for TRENDS_JOB_RETENTION seconds
+# after submission. Job status and results live in the SQLite database at
+# TRENDS_JOB_DB_PATH, so any worker can answer a status request; set it to an
+# empty string to keep jobs in memory (single-worker deployments only).
+TRENDS_JOB_WORKERS = int(os.environ.get('TRENDS_JOB_WORKERS', 2))
+TRENDS_JOB_RETENTION = float(os.environ.get('TRENDS_JOB_RETENTION', 3600))
+TRENDS_JOB_DB_PATH = os.environ.get('TRENDS_JOB_DB_PATH', 'jobs.db')
+
+# Rate limiting: "sqlite" shares limiter state between all worker processes
+# through RATE_LIMIT_DB_PATH; "memory" keeps it per process; "none" turns
+# limiting off (local load tests only).
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite')
+RATE_LIMIT_DB_PATH = os.environ.get('RATE_LIMIT_DB_PATH', 'ratelimit.db')
+RATE_LIMIT_SWEEP_INTERVAL = 60
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 10000))
+
+# Seconds between keep-alive comments on /trends/stream while nothing happens
+SSE_HEARTBEAT_SECONDS = 15
+
+# Prometheus metrics at /metrics. With several worker processes, point
+# PROMETHEUS_MULTIPROC_DIR at a directory shared by all of them (gunicorn.conf.py
+# does this) and each scrape aggregates every worker's samples.
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR', '')
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# On-demand profiling: a request sent with an X-Profile-Token header equal to
+# PROFILE_TOKEN is sampled every PROFILE_INTERVAL seconds, and its collapsed
+# stacks are saved to PROFILE_DIR for /profiles/<id>. Without a token no
+# profiling hooks are installed at all. Fetching a profile and scraping
+# /metrics are never profiled themselves.
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_MAX_FILES = 100
+# Helper threads that work on behalf of a request and are sampled with it
+PROFILE_THREAD_PREFIXES = ("feed-fetch", "groq-batch", "feed-ingestor", "trends-stream")
+PROFILE_EXCLUDED_ENDPOINTS = {"get_profile", "metrics"}
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire ttl seconds after being set.
+    """
+
+    def __init__(self, maxsize=128, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for it and share its result or
+    exception instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Returns (result, shared), where shared is True for followers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result'], True
+
+        try:
+            call['result'] = fn(*args, **kwargs)
+            return call['result'], False
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
+
+def token_bucket_update(tokens, updated, now, capacity, rate, amount):
+    """
+    Refills a bucket that held tokens at time updated, then books amount.
+    Returns (new token level, seconds to wait before spending them).
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate) - amount
+    return tokens, (0.0 if tokens >= 0 else -tokens / rate)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate tokens per second, up to capacity.
+
+    reserve() books tokens straight away and returns how long the caller has
+    to wait before spending them. The bucket may go into debt, which is how
+    queued callers line up behind each other.
+    """
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        with self._lock:
+            now = self.clock()
+            self._tokens, wait = token_bucket_update(self._tokens, self._updated, now, self.capacity, self.rate, amount)
+            self._updated = now
+            return wait
+
+class GroqRateLimiter:
+    """
+    Paces Groq calls against both the requests-per-minute and the
+    tokens-per-minute quota.
+
+    With db_path the buckets are SQLite rows shared by every process using
+    that database; otherwise they are private to this process.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep, db_path=None):
+        if db_path:
+            connections = SQLiteConnections(db_path)
+            self.requests = SQLiteTokenBucket(connections, "groq_requests", requests_per_minute, requests_per_minute / 60)
+            self.tokens = SQLiteTokenBucket(connections, "groq_tokens", tokens_per_minute, tokens_per_minute / 60)
+        else:
+            self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60, clock)
+            self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60, clock)
+        self.sleep = sleep
+
+    def reserve(self, tokens):
+        """Books one request of the given token cost and returns the wait in seconds."""
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens):
+        """Blocks until the call may go out and returns the seconds waited."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            logger.info(f"Groq quota: waiting {delay:.1f} seconds before next call")
+            self.sleep(delay)
+        return delay
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    Closed, calls go through and failure_threshold consecutive failures open
+    the circuit. Open, allow() refuses every call until reset_timeout has
+    passed, then lets a single probe through (half-open): its success closes
+    the circuit, its failure opens it for another reset_timeout.
+
+    The state is one record, which subclasses may keep elsewhere by
+    overriding _read() and _update().
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._record = self._initial_record()
+        self._lock = threading.Lock()
+
+    def _initial_record(self):
+        return {"state": "closed", "failures": 0, "opened": 0, "rejected": 0, "changed_at": self.clock()}
+
+    def _read(self):
+        """A snapshot of the breaker record."""
+        with self._lock:
+            return dict(self._record)
+
+    @contextmanager
+    def _update(self):
+        """The breaker record, held exclusively for the block and saved after it."""
+        with self._lock:
+            yield self._record
+
+    def _refusing(self, record, now):
+        # A probe that never reports back must not hold the circuit half-open forever
+        return record["state"] != "closed" and now - record["changed_at"] < self.reset_timeout
+
+    @staticmethod
+    def _set_state(record, state, now):
+        if state != record["state"]:
+            logger.warning(f"Groq circuit breaker {record['state']} -> {state}")
+        record["state"] = state
+        record["changed_at"] = now
+
+    @property
+    def state(self):
+        return self._read()["state"]
+
+    def is_open(self):
+        """True while calls are being refused; does not claim the half-open probe."""
+        return self._refusing(self._read(), self.clock())
+
+    def allow(self):
+        """Returns whether a call may go out now, claiming the probe when half-open."""
+        with self._update() as record:
+            now = self.clock()
+            if self._refusing(record, now):
+                record["rejected"] += 1
+                return False
+            if record["state"] != "closed":
+                self._set_state(record, "half_open", now)
+            return True
+
+    def record_success(self):
+        with self._update() as record:
+            record["failures"] = 0
+            if record["state"] != "closed":
+                self._set_state(record, "closed", self.clock())
+
+    def record_failure(self):
+        with self._update() as record:
+            record["failures"] += 1
+            if record["state"] != "closed" or record["failures"] >= self.failure_threshold:
+                if record["state"] == "closed":
+                    record["opened"] += 1
+                self._set_state(record, "open", self.clock())
+
+    def stats(self):
+        record = self._read()
+        return {
+            "state": record["state"],
+            "consecutive_failures": record["failures"],
+            "times_opened": record["opened"],
+            "calls_rejected": record["rejected"]
+        }
+
+class DiskCache:
+    """
+    Content-addressed JSON cache on disk with size-bounded LRU eviction.
+
+    Each entry is a file named after the SHA-256 of its key. Reads refresh
+    the file's mtime; once the directory grows past max_bytes the least
+    recently used files are removed. Writes go through a temporary file and
+    os.replace, so other workers never read a partial entry.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._written = max_bytes  # forces a size check on the first write
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, path)
+            self._written += os.path.getsize(path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            return
+
+        # Scanning the directory is O(entries), so only do it every ~10% of max_bytes written
+        if self._written >= self.max_bytes // 10:
+            self._written = 0
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache is back under 90% of max_bytes."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+            stats = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+        except OSError as e:
+            logger.warning(f"Could not scan cache directory {self.directory}: {e}")
+            return
+
+        total = sum(size for _, size, _ in stats)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text):
+    """
+    Approximate token count without a real tokenizer: punctuation marks count
+    one token each and words one token per six characters, which slightly
+    overestimates BPE tokenizers on English news text.
+    """
+    return sum((len(piece) + 5) // 6 for piece in TOKEN_PATTERN.findall(text)) + 1
+
+class SQLiteConnections:
+    """
+    Per-thread SQLite connections in autocommit and WAL mode.
+
+    Connections are never shared between threads, and are reopened in a
+    forked child rather than reusing the parent's.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+class SQLiteTokenBucket:
+    """
+    TokenBucket whose level is a row in a SQLite database, so every worker
+    process on the host draws from the same bucket.
+
+    Each reserve() is a single-row read and upsert inside an immediate
+    transaction. Times are wall-clock seconds, which unlike the monotonic
+    clock mean the same thing in every process and across restarts.
+    """
+
+    def __init__(self, connections, name, capacity, rate, clock=time.time):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self._connections = connections
+        self._connections.get().execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def reserve(self, amount=1):
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = self.clock()
+            row = conn.execute("SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens, updated = row if row else (self.capacity, now)
+            tokens, wait = token_bucket_update(tokens, updated, now, self.capacity, self.rate, amount)
+            conn.execute("INSERT OR REPLACE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                         (self.name, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+class SQLiteCircuitBreaker(CircuitBreaker):
+    """
+    CircuitBreaker whose record is a row in a SQLite database, so every
+    worker process on the host sees the same state and one probe serves
+    them all.
+
+    Changes are a read and upsert inside an immediate transaction, and the
+    clock is wall-clock time for the same reason as in SQLiteTokenBucket.
+    """
+
+    FIELDS = ("state", "failures", "opened", "rejected", "changed_at")
+
+    def __init__(self, connections, name, failure_threshold=5, reset_timeout=60, clock=time.time):
+        self.name = name
+        self._connections = connections
+        super().__init__(failure_threshold, reset_timeout, clock)
+        self._connections.get().execute(
+            "CREATE TABLE IF NOT EXISTS circuit_breakers (name TEXT PRIMARY KEY, state TEXT NOT NULL, "
+            "failures INTEGER NOT NULL, opened INTEGER NOT NULL, rejected INTEGER NOT NULL, changed_at REAL NOT NULL)"
+        )
+
+    def _select(self, conn):
+        row = conn.execute(
+            f"SELECT {', '.join(self.FIELDS)} FROM circuit_breakers WHERE name = ?", (self.name,)
+        ).fetchone()
+        return dict(zip(self.FIELDS, row)) if row else self._initial_record()
+
+    def _read(self):
+        return self._select(self._connections.get())
+
+    @contextmanager
+    def _update(self):
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            record = self._select(conn)
+            before = dict(record)
+            yield record
+            if record != before:
+                conn.execute(
+                        f"INSERT OR REPLACE INTO circuit_breakers (name, {', '.join(self.FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.name, *(record[field] for field in self.FIELDS))
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+# --- Metrics ---
+FEED_FETCH_SECONDS = Histogram(
+    'feed_fetch_duration_seconds', "Time to download one feed", ['feed'], buckets=LATENCY_BUCKETS
+)
+FEED_PARSE_SECONDS = Histogram(
+    'feed_parse_duration_seconds', "Time feedparser spends on one feed body", ['feed'], buckets=LATENCY_BUCKETS
+)
+TRENDS_STAGE_SECONDS = Histogram(
+    'trends_stage_duration_seconds',
+    "Time spent in each /trends pipeline stage: articles, prepare, analysis, consolidation, enrich",
+    ['stage'], buckets=LATENCY_BUCKETS
+)
+GROQ_BATCH_SECONDS = Histogram(
+    'groq_batch_duration_seconds', "Time to analyze one batch, including quota waits and retries",
+    ['outcome'], buckets=LATENCY_BUCKETS
+)
+GROQ_REQUEST_SECONDS = Histogram(
+    'groq_request_duration_seconds', "Time of one HTTP call to Groq, by outcome", ['outcome'], buckets=LATENCY_BUCKETS
+)
+GROQ_WAIT_SECONDS = Histogram(
+    'groq_wait_duration_seconds', "Time slept before a Groq call: quota pacing or retry backoff",
+    ['reason'], buckets=LATENCY_BUCKETS
+)
+GROQ_RETRIES = Counter('groq_retries_total', "Groq calls retried, by reason", ['reason'])
+GROQ_CIRCUIT_REJECTIONS = Counter('groq_circuit_rejections_total', "Groq calls refused by the open circuit breaker")
+TRENDS_DEGRADED = Counter(
+    'trends_degraded_total', "/trends answers served without Groq while the circuit was open, by source", ['source']
+)
+RATE_LIMIT_REJECTIONS = Counter('rate_limit_rejections_total', "Requests refused by rate_limit", ['endpoint'])
+
+def observe_groq_request(outcome, started):
+    GROQ_REQUEST_SECONDS.labels(outcome=outcome).observe(time.monotonic() - started)
+
+def record_groq_retry(reason, wait_time):
+    """Counts a retry of a Groq call and the backoff it is about to sleep."""
+    GROQ_RETRIES.labels(reason=reason).inc()
+    GROQ_WAIT_SECONDS.labels(reason="backoff").observe(wait_time)
+
+def metrics_payload():
+    """
+    Prometheus text exposition of this process's metrics, or of every
+    worker's when running in multiprocess mode.
+    """
+    registry = REGISTRY
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+# --- Profiling ---
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler built on sys._current_frames().
+
+    While running, a background thread records the Python stack of the
+    profiled thread, and of busy helper threads named with one of
+    thread_prefixes, every interval seconds. Results come out in collapsed
+    stack format ("root;caller;callee count" per line), which flamegraph.pl,
+    inferno and speedscope read directly. Helper threads are shared by the
+    whole worker, so under concurrent load their stacks may include other
+    requests' work.
+    """
+
+    def __init__(self, thread_id, thread_prefixes=PROFILE_THREAD_PREFIXES, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.thread_prefixes = thread_prefixes
+        self.interval = interval
+        self.samples = StackCounter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            marker = f"site-packages{os.sep}"
+            filename = filename.split(marker, 1)[1] if marker in filename else os.path.basename(filename)
+            label = self._labels[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+        return label
+
+    @staticmethod
+    def _idle(frame):
+        """True for a helper thread parked waiting for work rather than doing any."""
+        code = frame.f_code
+        return (
+            (code.co_name == "_worker" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py")))
+            or (code.co_name == "wait" and code.co_filename == threading.__file__)
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.thread_id:
+                    root = "request"
+                else:
+                    name = names.get(ident, "")
+                    if not name.startswith(self.thread_prefixes) or self._idle(frame):
+                        continue
+                    root = name.rsplit("_", 1)[0]  # pool workers share one root
+
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(root)
+                self.samples[";".join(reversed(stack))] += 1
+
+def new_profile_id(endpoint):
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{endpoint}-{uuid.uuid4().hex[:8]}"
+
+def save_profile(profiler, profile_id):
+    """
+    Writes a finished profile to PROFILE_DIR, keeping the newest
+    PROFILE_MAX_FILES.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.collapsed")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(profiler.collapsed())
+    os.replace(f"{path}.tmp", path)
+
+    profiles = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".collapsed")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+def finish_profile(profiler, profile_id):
+    save_profile(profiler.stop(), profile_id)
+    logger.info(f"Saved profile {profile_id} ({sum(profiler.samples.values())} samples)")
+
+def profile_token_valid():
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(request.headers.get('X-Profile-Token', ''), PROFILE_TOKEN)
+
+# --- Rate limiting ---
+def gcra_update(tat, now, emission_interval, period):
+    """
+    One step of the generic cell rate algorithm (GCRA).
+
+    tat is the client's stored theoretical arrival time (None for a new
+    client). A request is allowed when spending one emission interval would
+    not push the TAT more than period ahead of now, which permits bursts of
+    up to max_requests and then one request per emission interval. This is
+    not a fixed cap per period: a window of period seconds that starts with
+    a full burst can hold up to 2 * max_requests - 1 requests.
+    Returns (allowed, new_tat, retry_after).
+    """
+    tat = max(tat if tat is not None else now, now)
+    new_tat = tat + emission_interval
+    allow_at = new_tat - period
+    if now < allow_at:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+class MemoryRateLimitBackend:
+    """
+    GCRA state held in this process, bounded to max_clients keys.
+
+    Keys are kept in least-recently-seen order. Past the cap the stalest
+    client is evicted, which only resets that client's limit. Clients whose
+    TAT has passed are indistinguishable from new ones, so a periodic sweep
+    drops them too and memory stays flat however many clients show up.
+    """
+    name = "memory"
+
+    def __init__(self, max_clients=RATE_LIMIT_MAX_CLIENTS, sweep_interval=RATE_LIMIT_SWEEP_INTERVAL):
+        self.max_clients = max_clients
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._tats = OrderedDict()
+        self._next_sweep = 0.0
+
+    def hit(self, key, emission_interval, period, now):
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            allowed, tat, retry_after = gcra_update(self._tats.get(key), now, emission_interval, period)
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_clients:
+                self._tats.popitem(last=False)
+                self.evictions += 1
+            return allowed, retry_after
+
+    def _sweep(self, now):
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        self.expirations += len(expired)
+        self._next_sweep = now + self.sweep_interval
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "live_keys": len(self._tats),
+            "max_keys": self.max_clients,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class SQLiteRateLimitBackend:
+    """
+    GCRA state in a SQLite database shared by every worker process on the host.
+
+    Each hit is a single-row read and upsert inside an immediate transaction,
+    so concurrent workers serialize on the row and enforce one limit.
+    """
+    name = "sqlite"
+
+    def __init__(self, path, sweep_interval=RATE_LIMIT_SWEEP_INTERVAL):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._connections = SQLiteConnections(path)
+        self._next_sweep = 0.0
+        self._connections.get().execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def hit(self, key, emission_interval, period, now):
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            allowed, tat, retry_after = gcra_update(row[0] if row else None, now, emission_interval, period)
+            conn.execute("INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)", (key, tat))
+            if now >= self._next_sweep:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                self._next_sweep = now + self.sweep_interval
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    def stats(self):
+        count = self._connections.get().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+        return {"backend": self.name, "live_keys": count}
+
+class NullRateLimitBackend:
+    """Allows every request. For load-testing a local server."""
+    name = "none"
+
+    def hit(self, key, emission_interval, period, now):
+        return True, 0.0
+
+    def stats(self):
+        return {"backend": self.name}
+
+def create_rate_limit_backend(name):
+    if name == "sqlite":
+        return SQLiteRateLimitBackend(RATE_LIMIT_DB_PATH)
+    if name == "none":
+        return NullRateLimitBackend()
+    if name != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND {name!r}, using memory")
+    return MemoryRateLimitBackend()
+
+rate_limit_backend = create_rate_limit_backend(RATE_LIMIT_BACKEND)
 
 # Rate limiting decorator
-def rate_limit(max_requests=10, per_minutes=60):
+def rate_limit(max_requests=10, per_minutes=60, scope=None):
+    """
+    Limits each client on the decorated route to a burst of max_requests,
+    after which one request is let through every per_minutes / max_requests
+    minutes (GCRA, see gcra_update). Routes decorated with the same scope
+    share one budget; by default each route has its own.
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            client_ip = request.remote_addr
-            current_time = time.time()
-            
-            if not hasattr(decorated_function, 'requests'):
-                decorated_function.requests = {}
-            
-            if client_ip not in decorated_function.requests:
-                decorated_function.requests[client_ip] = []
-            
-            # Clean old requests
-            decorated_function.requests[client_ip] = [
-                req_time for req_time in decorated_function.requests[client_ip]
-                if current_time - req_time < per_minutes * 60
-            ]
-            
-            if len(decorated_function.requests[client_ip]) >= max_requests:
-                return jsonify({
-                    "error": "Rate limit exceeded",
-                    "message": f"Maximum {max_requests} requests per {per_minutes} minutes"
-                }), 429
-            
-            decorated_function.requests[client_ip].append(current_time)
+            rejection = rate_limit_check(f"{scope or f.__name__}:{request.remote_addr}", f.__name__, max_requests, per_minutes)
+            if rejection is not None:
+                body, headers = rejection
+                return jsonify(body), 429, headers
+
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def rate_limit_check(key, endpoint, max_requests, per_minutes):
+    """
+    Counts one request against key's budget. Returns None when it may go
+    ahead, or the (body, headers) of the 429 answer when it may not.
+    """
+    period = per_minutes * 60
+    try:
+        allowed, retry_after = rate_limit_backend.hit(key, period / max_requests, period, time.time())
+    except Exception as e:
+        # Fail open: a broken limiter store should not take the API down
+        logger.error(f"Rate limiter error: {e}")
+        return None
+
+    if allowed:
+        return None
+    RATE_LIMIT_REJECTIONS.labels(endpoint=endpoint).inc()
+    interval = period / max_requests
+    every = f"{interval / 60:g} minutes" if interval >= 60 else f"{interval:g} seconds"
+    return {
+        "error": "Rate limit exceeded",
+        "message": f"Bursts of up to {max_requests} requests, then one every {every}"
+    }, {"Retry-After": str(math.ceil(retry_after))}
+
+# /trends, /trends/stream and /trends/jobs all start the Groq pipeline, so
+# they draw on one per-client budget
+trends_rate_limit = rate_limit(max_requests=2, per_minutes=60, scope="trends")
+
+groq_limiter = GroqRateLimiter(GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE, db_path=GROQ_QUOTA_DB_PATH)
+if GROQ_QUOTA_DB_PATH:
+    groq_breaker = SQLiteCircuitBreaker(SQLiteConnections(GROQ_QUOTA_DB_PATH), "groq", GROQ_BREAKER_FAILURES, GROQ_BREAKER_RESET)
+else:
+    groq_breaker = CircuitBreaker(GROQ_BREAKER_FAILURES, GROQ_BREAKER_RESET)
+llm_cache = DiskCache(LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES) if LLM_CACHE_DIR else None
+groq_executor = ThreadPoolExecutor(max_workers=GROQ_MAX_CONCURRENCY, thread_name_prefix="groq-batch")
+
+_groq_session = None
+_groq_session_pid = None
+_groq_session_lock = threading.Lock()
+
+def get_groq_session():
+    """
+    Returns this process's pooled, keep-alive HTTP session for Groq.
+
+    The session is created lazily and recreated after a fork, so gunicorn
+    workers never share sockets inherited from the master.
+    """
+    global _groq_session, _groq_session_pid
+    if _groq_session_pid != os.getpid():
+        with _groq_session_lock:
+            if _groq_session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GROQ_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _groq_session = session
+                _groq_session_pid = os.getpid()
+    return _groq_session
+
+def groq_connection_stats():
+    """
+    Reports how many Groq requests went over an already-open connection.
+    """
+    opened = sent = 0
+    if _groq_session is not None and _groq_session_pid == os.getpid():
+        pools = _groq_session.get_adapter(GROQ_API_URL).poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+    return {
+        "pool_size": GROQ_POOL_SIZE,
+        "requests": sent,
+        "connections_opened": opened,
+        "reuse_rate": round((sent - opened) / sent, 3) if sent else None
+    }
+
 # --- Core Functions ---
-def get_articles_from_feeds(feed_urls, hours_back=72):
+def feed_request_headers(url):
+    """
+    Request headers for fetching url, including the validators remembered
+    from its last successful fetch.
+    """
+    headers = {"User-Agent": FEED_USER_AGENT}
+    previous = feed_validators.get(url)
+    if previous:
+        if previous['etag']:
+            headers['If-None-Match'] = previous['etag']
+        if previous['modified']:
+            headers['If-Modified-Since'] = previous['modified']
+    return headers
+
+def parse_feed_body(url, body, response_headers, final_url):
+    """
+    Hands a downloaded feed body to feedparser and remembers the response's
+    validators, along with the parsed feed, for the next fetch of url.
+    """
+    # feedparser expects lower-cased header names
+    headers = {key.lower(): value for key, value in response_headers.items()}
+    headers.setdefault('content-location', final_url)
+
+    with FEED_PARSE_SECONDS.labels(feed=url).time():
+        feed = feedparser.parse(body, response_headers=headers)
+
+    etag = headers.get('etag')
+    modified = headers.get('last-modified')
+    with feed_validators_lock:
+        if etag or modified:
+            feed_validators[url] = {'etag': etag, 'modified': modified, 'feed': feed}
+        else:
+            feed_validators.pop(url, None)
+
+    return feed
+
+def fetch_feed(url, timeout=None):
+    """
+    Downloads a single feed and hands the body to feedparser.
+
+    The timeout covers the whole download, not just each socket read, so a
+    server trickling bytes cannot hold the fetch open past its budget.
+    Validators from the previous fetch are sent along; on a 304 the feed
+    parsed last time is returned without downloading or parsing anything.
+    """
+    timeout = FEED_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    previous = feed_validators.get(url)
+
+    with requests.get(url, headers=feed_request_headers(url), timeout=timeout, stream=True) as response:
+        if response.status_code == 304 and previous:
+            FEED_FETCH_SECONDS.labels(feed=url).observe(time.monotonic() - started)
+            logger.info(f"Feed {url} not modified since last poll")
+            return previous['feed']
+
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > FEED_MAX_BYTES:
+                raise ValueError(f"Feed body exceeds {FEED_MAX_BYTES} bytes")
+            if time.monotonic() - started > timeout:
+                raise requests.exceptions.Timeout(f"Feed download exceeded {timeout} seconds")
+        FEED_FETCH_SECONDS.labels(feed=url).observe(time.monotonic() - started)
+
+        return parse_feed_body(url, b"".join(chunks), response.headers, response.url)
+
+def parse_feed_articles(feed, url, lookback_period):
+    """
+    Turns parsed feed entries into article dicts published after lookback_period.
+    """
+    articles = []
+    feed_title = feed.feed.get('title', url)
+    logger.info(f"Checking feed: {feed_title}")
+
+    for entry in feed.entries:
+        published_time = None
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+            published_time = datetime.fromtimestamp(time.mktime(entry.published_parsed))
+        elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+            published_time = datetime.fromtimestamp(time.mktime(entry.updated_parsed))
+
+        if not published_time or published_time < lookback_period:
+            continue
+
+        article = {
+            'title': entry.title,
+            'link': entry.link,
+            'summary': entry.get('summary', entry.get('description', 'No summary available.')),
+            'published': published_time.isoformat() if published_time else None,
+            'source': feed_title
+        }
+        articles.append(article)
+
+    return articles
+
+def get_articles_from_feeds(feed_urls, hours_back=72, deadline=None):
     """
     Fetches and parses articles from a list of RSS feed URLs.
+
+    Feeds are fetched concurrently, so latency tracks the slowest feed rather
+    than the sum of all of them. Feeds still running when the deadline passes
+    are skipped for this call. Articles keep the order of feed_urls.
     """
-    all_articles = []
     lookback_period = datetime.now() - timedelta(hours=hours_back)
+    deadline = FEED_DEADLINE if deadline is None else deadline
 
     logger.info(f"Fetching articles from feeds (looking back {hours_back} hours)...")
-    
-    for url in feed_urls:
-        try:
-            feed = feedparser.parse(url, agent="AITrendFinder/1.0")
-            feed_title = feed.feed.get('title', url)
-            logger.info(f"Checking feed: {feed_title}")
-            
-            for entry in feed.entries:
-                published_time = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    published_time = datetime.fromtimestamp(time.mktime(entry.published_parsed))
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    published_time = datetime.fromtimestamp(time.mktime(entry.updated_parsed))
-
-                if not published_time or published_time < lookback_period:
-                    continue
 
-                article = {
-                    'title': entry.title,
-                    'link': entry.link,
-                    'summary': entry.get('summary', entry.get('description', 'No summary available.')),
-                    'published': published_time.isoformat() if published_time else None,
-                    'source': feed_title
-                }
-                all_articles.append(article)
-                
+    futures = {url: feed_executor.submit(fetch_feed, url) for url in feed_urls}
+    _, not_done = wait(futures.values(), timeout=deadline)
+
+    all_articles = []
+    for url, future in futures.items():
+        if future in not_done:
+            future.cancel()
+            logger.error(f"Feed {url} did not finish within the {deadline} second deadline")
+            continue
+        try:
+            all_articles.extend(parse_feed_articles(future.result(), url, lookback_period))
         except Exception as e:
             logger.error(f"Error fetching or parsing feed {url}: {e}")
-    
+
     logger.info(f"Found {len(all_articles)} new articles from the last {hours_back} hours.")
     return all_articles
 
-def call_groq_api_http(system_prompt, user_prompt, max_retries=3):
+class ArticleStore:
     """
-    Call Groq API using direct HTTP requests instead of the problematic client library.
+    Thread-safe, time-indexed article store.
+
+    Articles are kept sorted by publish time, so a lookback query is a bisect
+    plus a slice. Links are unique, and articles that fall out of the
+    retention window are dropped as new ones arrive.
     """
-    if not GROQ_API_KEY or GROQ_API_KEY == "PASTE_YOUR_GROQ_API_KEY_HERE":
-        logger.error("Groq API key not set.")
+
+    def __init__(self, retention_hours=ARTICLE_RETENTION_HOURS):
+        self.retention_hours = retention_hours
+        self._lock = threading.Lock()
+        self._keys = []       # sorted (published, insertion sequence)
+        self._articles = []   # parallel to _keys
+        self._links = set()
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._articles)
+
+    def add_articles(self, articles):
+        """Inserts articles not already stored and returns how many were added."""
+        added = 0
+        with self._lock:
+            for article in articles:
+                if not article.get('published') or article['link'] in self._links:
+                    continue
+                self._sequence += 1
+                key = (article['published'], self._sequence)
+                index = bisect.bisect(self._keys, key)
+                self._keys.insert(index, key)
+                self._articles.insert(index, article)
+                self._links.add(article['link'])
+                added += 1
+            self._prune()
+        return added
+
+    def query(self, hours_back):
+        """Returns articles published in the last hours_back hours, newest first."""
+        cutoff = (datetime.now() - timedelta(hours=hours_back)).isoformat()
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (cutoff,))
+            return self._articles[start:][::-1]
+
+    def _prune(self):
+        cutoff = (datetime.now() - timedelta(hours=self.retention_hours)).isoformat()
+        stale = bisect.bisect_left(self._keys, (cutoff,))
+        if stale:
+            for article in self._articles[:stale]:
+                self._links.discard(article['link'])
+            del self._keys[:stale]
+            del self._articles[:stale]
+
+class ArticleArchive:
+    """
+    Persistent article store backed by SQLite, with the same interface as
+    ArticleStore.
+
+    Articles are deduplicated by link and indexed by publish time and
+    source, so a lookback query is an index range scan. Nothing is pruned;
+    the archive keeps history beyond the lookback window.
+    """
+
+    def __init__(self, path, retention_hours=ARTICLE_RETENTION_HOURS):
+        self.path = path
+        self.retention_hours = retention_hours
+        self._connections = SQLiteConnections(path)
+        conn = self._connections.get()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                link TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                summary TEXT,
+                published TEXT NOT NULL,
+                source TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source)")
+
+    def __len__(self):
+        return self._connections.get().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def add_articles(self, articles):
+        """Inserts articles not already archived and returns how many were added."""
+        rows = [
+            (article['link'], article['title'], article['summary'], article['published'], article['source'])
+            for article in articles if article.get('published')
+        ]
+        conn = self._connections.get()
+        before = conn.total_changes
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (link, title, summary, published, source) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.total_changes - before
+
+    def query(self, hours_back):
+        """Returns articles published in the last hours_back hours, newest first."""
+        cutoff = (datetime.now() - timedelta(hours=hours_back)).isoformat()
+        rows = self._connections.get().execute(
+            "SELECT title, link, summary, published, source FROM articles "
+            "WHERE published >= ? ORDER BY published DESC",
+            (cutoff,)
+        ).fetchall()
+        return [
+            {'title': title, 'link': link, 'summary': summary, 'published': published, 'source': source}
+            for title, link, summary, published, source in rows
+        ]
+
+class FeedIngestor:
+    """
+    Background worker that polls feeds on a schedule and fills an ArticleStore.
+
+    The thread is started lazily from the first request that needs it, and
+    restarted if the process has been forked since (gunicorn workers do not
+    inherit threads from the master).
+    """
+
+    def __init__(self, store, feed_urls, interval):
+        self.store = store
+        self.feed_urls = feed_urls
+        self.interval = interval
+        self.last_poll = None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def ensure_running(self, wait_timeout=None):
+        """
+        Starts the polling thread if needed. While the store is still empty
+        (a cold start without an archive), waits for the first poll.
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.ready.clear()
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="feed-ingestor", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+        if not self.ready.is_set() and not len(self.store):
+            self.ready.wait(FEED_DEADLINE + 5 if wait_timeout is None else wait_timeout)
+
+    def stop(self):
+        self._stop.set()
+
+    def poll_once(self):
+        articles = get_articles_from_feeds(self.feed_urls, hours_back=self.store.retention_hours)
+        added = self.store.add_articles(articles)
+        self.last_poll = datetime.now()
+        logger.info(f"Ingested {added} new articles ({len(self.store)} stored)")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Feed ingestion poll failed: {e}")
+            finally:
+                self.ready.set()
+            self._stop.wait(self.interval)
+
+article_store = ArticleArchive(ARTICLE_ARCHIVE_PATH) if ARTICLE_ARCHIVE_PATH else ArticleStore()
+feed_ingestor = FeedIngestor(article_store, RSS_FEEDS, INGEST_INTERVAL)
+feed_flight = SingleFlight()
+
+def get_recent_articles(hours_back):
+    """
+    Returns recent articles from the ingestion store, or straight from the
+    feeds when background ingestion is disabled.
+    """
+    if not INGEST_INTERVAL:
+        articles, _ = feed_flight.do(hours_back, get_articles_from_feeds, RSS_FEEDS, hours_back=hours_back)
+        return articles
+    feed_ingestor.ensure_running()
+    return article_store.query(hours_back)
+
+def groq_cache_key(system_prompt, user_prompt):
+    """Response cache key for a prompt pair, or None when caching is off."""
+    if llm_cache is None:
         return None
+    return llm_cache.make_key(GROQ_MODEL, system_prompt, user_prompt, GROQ_TEMPERATURE)
 
+def build_groq_request(system_prompt, user_prompt):
+    """
+    Returns (headers, payload, estimated token cost) for one chat completion call.
+    """
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json",
@@ -120,121 +1373,427 @@ def call_groq_api_http(system_prompt, user_prompt, max_retries=3):
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
-        "model": "llama3-8b-8192",
+        "model": GROQ_MODEL,
         "response_format": {"type": "json_object"},
-        "max_tokens": 4096,
-        "temperature": 0.3
+        "max_tokens": GROQ_MAX_COMPLETION_TOKENS,
+        "temperature": GROQ_TEMPERATURE
     }
+    request_tokens = estimate_tokens(system_prompt + user_prompt) + GROQ_COMPLETION_TOKENS_ESTIMATE
+    return headers, payload, request_tokens
+
+def groq_api_key_missing():
+    """True, and logged, when no Groq API key is configured."""
+    if not GROQ_API_KEY or GROQ_API_KEY == "PASTE_YOUR_GROQ_API_KEY_HERE":
+        logger.error("Groq API key not set.")
+        return True
+    return False
+
+def cached_groq_response(cache_key):
+    """The cached answer for a key from groq_cache_key, or None."""
+    return llm_cache.get(cache_key) if cache_key is not None else None
+
+def groq_circuit_allows():
+    """Whether the circuit breaker lets a Groq attempt go out; rejections are counted."""
+    if groq_breaker.allow():
+        return True
+    # Fail fast while Groq is down instead of holding the caller through retries
+    GROQ_CIRCUIT_REJECTIONS.inc()
+    logger.warning("Groq circuit breaker is open, not calling Groq")
+    return False
+
+def groq_attempt_outcome(attempt, max_retries, started, cache_key, response=None, error=None, error_kind="error"):
+    """
+    Decides what one Groq attempt leads to, from its HTTP response or from
+    the exception raised before a response arrived. error_kind is "timeout"
+    or "request_error" for failures of the HTTP client; any other error is
+    unexpected and ends the call.
+
+    Updates the circuit breaker, metrics and response cache, and returns
+    (result, wait). When wait is None the call is over and result is its
+    answer (None on failure); otherwise the caller sleeps wait seconds and
+    makes the next attempt. Both serving modes go through this, so they
+    differ only in how they post and how they sleep.
+    """
+    def retry(reason, wait_time):
+        if attempt >= max_retries - 1:
+            return None, 0
+        record_groq_retry(reason, wait_time)
+        return None, wait_time
+
+    def failure(reason, wait_time):
+        groq_breaker.record_failure()
+        observe_groq_request(reason, started)
+        if groq_breaker.is_open():
+            logger.error("Groq circuit breaker opened, giving up")
+            return None, None
+        return retry(reason, wait_time)
+
+    if error is not None:
+        if error_kind == "timeout":
+            logger.error(f"Request timeout on attempt {attempt + 1}")
+            return failure("timeout", 20)
+        if error_kind == "request_error":
+            logger.error(f"Request error: {error}")
+            return failure("request_error", 15)
+        observe_groq_request("error", started)
+        logger.error(f"Unexpected error: {error}")
+        return None, None
+
+    if response.status_code == 200:
+        groq_breaker.record_success()
+        try:
+            result = json.loads(response.json()['choices'][0]['message']['content'])
+        except json.JSONDecodeError as e:
+            observe_groq_request("invalid_response", started)
+            logger.error(f"JSON decode error: {e}")
+            return None, None
+        except Exception as e:
+            observe_groq_request("error", started)
+            logger.error(f"Unexpected error: {e}")
+            return None, None
+        observe_groq_request("ok", started)
+        if cache_key is not None:
+            llm_cache.set(cache_key, result)
+        return result, None
+
+    if response.status_code == 429:
+        # Throttled, not down: Groq answered, so this counts as a success
+        groq_breaker.record_success()
+        observe_groq_request("rate_limited", started)
+        wait_time = 30 * (attempt + 1)
+        logger.warning(f"Rate limit hit. Retrying in {wait_time} seconds... (Attempt {attempt + 1}/{max_retries})")
+        return retry("rate_limited", wait_time)
+
+    logger.error(f"Groq API returned status {response.status_code}: {response.text}")
+    return failure("http_error", 15 * (attempt + 1))
+
+def call_groq_api_http(system_prompt, user_prompt, max_retries=3):
+    """
+    Call Groq API using direct HTTP requests instead of the problematic client library.
+
+    Successful responses are cached on disk by (model, prompts, temperature),
+    so an unchanged prompt never goes back to Groq.
+    """
+    if groq_api_key_missing():
+        return None
+
+    cache_key = groq_cache_key(system_prompt, user_prompt)
+    cached_response = cached_groq_response(cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    headers, payload, request_tokens = build_groq_request(system_prompt, user_prompt)
 
     for attempt in range(max_retries):
+        if not groq_circuit_allows():
+            return None
+
+        started = time.monotonic()
+        response = error = None
+        error_kind = "error"
         try:
-            response = requests.post(
+            GROQ_WAIT_SECONDS.labels(reason="quota").observe(groq_limiter.acquire(request_tokens))
+            started = time.monotonic()
+            response = get_groq_session().post(
                 GROQ_API_URL,
                 headers=headers,
                 json=payload,
                 timeout=60
             )
-            
-            if response.status_code == 200:
-                response_json = response.json()
-                content = response_json['choices'][0]['message']['content']
-                return json.loads(content)
-            elif response.status_code == 429:
-                wait_time = 30 * (attempt + 1)
-                logger.warning(f"Rate limit hit. Retrying in {wait_time} seconds... (Attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-            else:
-                logger.error(f"Groq API returned status {response.status_code}: {response.text}")
-                wait_time = 15 * (attempt + 1)
-                time.sleep(wait_time)
+        except requests.exceptions.Timeout as e:
+            error, error_kind = e, "timeout"
+        except requests.exceptions.RequestException as e:
+            error, error_kind = e, "request_error"
+        except Exception as e:
+            error = e
+
+        result, wait = groq_attempt_outcome(attempt, max_retries, started, cache_key, response, error, error_kind)
+        if wait is None:
+            return result
+        time.sleep(wait)
+
+    logger.error("All retries failed.")
+    return None
+
+BATCH_SYSTEM_PROMPT = "You are an expert geopolitical analyst focused on India-US relations. Identify news topics involving BOTH India and USA. Respond ONLY with valid JSON containing 'trends' array."
+
+def format_article_for_prompt(article):
+    """The text one article contributes to a batch prompt."""
+    summary = article['summary'][:PROMPT_SUMMARY_CHARS] if article['summary'] else "No summary"
+    return f"Title: {article['title']}\nSummary: {summary}\n\n"
+
+def build_batch_prompt(batch):
+    """
+    Builds the (system, user) prompt pair for one batch of articles.
+    """
+    content_for_analysis = "".join(format_article_for_prompt(article) for article in batch)
+
+    user_prompt = f"""
+        From these articles, identify topics involving BOTH India and USA. Ignore single-country topics.
+        
+        Content:
+        ---
+        {content_for_analysis}
+        ---
+        
+        JSON format:
+        {{
+            "trends": [
+                {{ "trend_name": "US-India Trade Deal", "relevant_articles": ["Article Title 1"] }}
+            ]
+        }}
+        """
+    return BATCH_SYSTEM_PROMPT, user_prompt
+
+def parse_batch_response(response_json):
+    """The trends list from a batch response, or None if the response is unusable."""
+    if response_json and 'trends' in response_json and isinstance(response_json['trends'], list):
+        return response_json['trends']
+    return None
+
+def analyze_batch(batch):
+    """
+    Sends one batch to Groq. Returns its list of trends, or None if the call failed.
+    """
+    started = time.monotonic()
+    trends = parse_batch_response(call_groq_api_http(*build_batch_prompt(batch)))
+    GROQ_BATCH_SECONDS.labels(outcome="ok" if trends is not None else "failed").observe(time.monotonic() - started)
+    return trends
+
+def prompt_token_budget(template):
+    """
+    Token budget for the data in one prompt: what the context window and
+    the per-minute quota leave once the prompt template and the completion
+    are accounted for.
+    """
+    return min(
+        GROQ_CONTEXT_TOKENS - GROQ_MAX_COMPLETION_TOKENS,
+        GROQ_TOKENS_PER_MINUTE - GROQ_COMPLETION_TOKENS_ESTIMATE
+    ) - estimate_tokens(template)
+
+def batch_token_budget():
+    """Token budget for the articles in one batch prompt."""
+    return prompt_token_budget("".join(build_batch_prompt([])))
+
+def pack_batches(articles, max_articles=BATCH_MAX_ARTICLES, token_budget=None):
+    """
+    Packs articles into as few batches as possible, each holding at most
+    max_articles articles and token_budget prompt tokens.
+
+    First-fit decreasing: the largest articles are placed first, each into
+    the first batch with room. Every article lands in some batch, and one
+    too large for the budget gets a batch of its own. Articles keep their
+    original order within a batch.
+    """
+    token_budget = batch_token_budget() if token_budget is None else token_budget
+    sizes = [estimate_tokens(format_article_for_prompt(article)) for article in articles]
+
+    batches = []  # [used_tokens, [article indexes]]
+    for index in sorted(range(len(articles)), key=lambda i: -sizes[i]):
+        for batch in batches:
+            if len(batch[1]) < max_articles and batch[0] + sizes[index] <= token_budget:
+                batch[0] += sizes[index]
+                batch[1].append(index)
+                break
+        else:
+            batches.append([sizes[index], [index]])
+
+    batches.sort(key=lambda batch: min(batch[1]))
+    return [[articles[i] for i in sorted(indexes)] for _, indexes in batches]
+
+def iter_batch_analysis(batches):
+    """
+    Analyzes batches dispatched concurrently, yielding (index, batch, trends)
+    as each batch completes.
+
+    Pacing is left to the shared Groq rate limiter, so throughput follows the
+    configured quota rather than a fixed pause between batches.
+    """
+    logger.info(f"Dispatching {len(batches)} batches to Groq")
+
+    futures = {groq_executor.submit(analyze_batch, batch): index for index, batch in enumerate(batches)}
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            trends = future.result()
+        except Exception as e:
+            logger.error(f"Batch {index + 1} failed: {e}")
+            trends = None
+        logger.info(f"Finished Batch {index + 1} of {len(batches)}")
+        yield index, batches[index], trends
+
+def batch_progress_event(index, batch_count, batch, trends):
+    """Progress payload reported for each completed batch."""
+    return {
+        "batch": index + 1,
+        "batches": batch_count,
+        "articles": [article['title'] for article in batch],
+        "trends": trends or [],
+        "failed": trends is None
+    }
+
+def analyze_articles_in_batches(articles, batch_size=BATCH_MAX_ARTICLES, progress=None):
+    """
+    Analyzes articles in as few Groq calls as the token budget allows.
+
+    Batches are packed by estimated token count, so no prompt is truncated
+    and no article is dropped; batch_size only caps the articles per batch.
+
+    If given, progress(event, data) is called with a "batch" event as each
+    batch completes.
+    """
+    batches = pack_batches(articles, max_articles=batch_size)
+    results = []
+    for index, batch, trends in iter_batch_analysis(batches):
+        results.append((index, batch, trends))
+        if progress is not None:
+            progress("batch", batch_progress_event(index, len(batches), batch, trends))
+    return merge_batch_trends(results)
+
+def merge_batch_trends(results):
+    """The trends of (index, batch, trends) results, in batch order; failed batches add nothing."""
+    all_trends = []
+    for _, _, trends in sorted(results, key=lambda result: result[0]):
+        if trends:
+            all_trends.extend(trends)
+    return all_trends
+
+class TitleMatcher:
+    """
+    Resolves titles returned by the LLM, which are often paraphrased or
+    re-punctuated, to the articles they came from.
+
+    The article titles are turned into an L2-normalized character n-gram
+    TF-IDF matrix once. match() then vectorizes every query title and scores
+    all of them against all articles in a single sparse matrix product.
+    """
 
-        except requests.exceptions.Timeout:
-            logger.error(f"Request timeout on attempt {attempt + 1}")
-            if attempt < max_retries - 1:
-                time.sleep(20)
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(15)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return None
+    def __init__(self, articles, ngram_size=3):
+        self.articles = articles
+        self.ngram_size = ngram_size
+        self.vocabulary = {}
+        self._exact = {article['title']: article for article in articles}
 
-    logger.error("All retries failed.")
-    return None
+        counts = self._count_matrix([article['title'] for article in articles], grow=True)
+        document_frequency = np.bincount(counts.indices, minlength=len(self.vocabulary))
+        self.idf = np.log((1 + len(articles)) / (1 + document_frequency)) + 1
+        self.matrix = self._weigh(counts)
+
+    def _ngrams(self, text):
+        text = f" {' '.join(str(text).lower().split())} "
+        return [text[i:i + self.ngram_size] for i in range(len(text) - self.ngram_size + 1)]
+
+    def _count_matrix(self, titles, grow=False):
+        rows, columns = [], []
+        for row, title in enumerate(titles):
+            for gram in self._ngrams(title):
+                column = self.vocabulary.setdefault(gram, len(self.vocabulary)) if grow else self.vocabulary.get(gram)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(titles), len(self.vocabulary))
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def _weigh(self, counts):
+        weighted = sparse.csr_matrix(counts.multiply(self.idf))
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ weighted
+
+    def match(self, titles, threshold=TITLE_MATCH_THRESHOLD):
+        """Returns the best matching article (or None) for each title, in order."""
+        titles = [str(title) for title in titles]
+        if not titles or not self.articles:
+            return [None] * len(titles)
+
+        queries = self._weigh(self._count_matrix(titles))
+        best = np.empty(len(titles), dtype=int)
+        scores = np.empty(len(titles))
+        # Score in blocks of queries so the dense similarity block stays small
+        for start in range(0, len(titles), 256):
+            block = (queries[start:start + 256] @ self.matrix.T).toarray()
+            best[start:start + 256] = block.argmax(axis=1)
+            scores[start:start + 256] = block.max(axis=1)
+
+        return [
+            self._exact.get(title) or (self.articles[index] if score >= threshold else None)
+            for title, index, score in zip(titles, best, scores)
+        ]
+
+article_analysis = TTLCache(maxsize=ARTICLE_ANALYSIS_CACHE_SIZE, ttl=ARTICLE_RETENTION_HOURS * 3600)
 
-def analyze_articles_in_batches(articles, batch_size=10):
+def record_batch_analysis(batch, trends):
     """
-    Analyzes articles in smaller batches to avoid hitting API rate limits.
+    Stores, for every article in an analyzed batch, the names of the trends
+    Groq assigned it to. Articles assigned to no trend are stored with an
+    empty list so they are not sent again.
     """
-    all_trends = []
-    num_batches = (len(articles) + batch_size - 1) // batch_size
+    trend_names = {article['link']: [] for article in batch}
+    matcher = TitleMatcher(batch)
 
-    for i in range(num_batches):
-        logger.info(f"Processing Batch {i+1} of {num_batches} with Groq")
-        batch = articles[i * batch_size:(i + 1) * batch_size]
+    for trend in trends:
+        if not isinstance(trend, dict):
+            continue
+        relevant_articles = trend.get('relevant_articles', [])
+        if not isinstance(relevant_articles, list):
+            continue
+        name = trend.get('trend_name', 'N/A')
+        for article in matcher.match(relevant_articles):
+            if article is not None and name not in trend_names[article['link']]:
+                trend_names[article['link']].append(name)
 
-        content_for_analysis = ""
-        for article in batch:
-            # Truncate summary to avoid token limits
-            summary = article['summary'][:150] if article['summary'] else "No summary"
-            content_for_analysis += f"Title: {article['title']}\nSummary: {summary}\n\n"
+    for link, names in trend_names.items():
+        article_analysis.set(link, names)
 
-        system_prompt = "You are an expert geopolitical analyst focused on India-US relations. Identify news topics involving BOTH India and USA. Respond ONLY with valid JSON containing 'trends' array."
-        user_prompt = f"""
-        From these articles, identify topics involving BOTH India and USA. Ignore single-country topics.
-        
-        Content:
-        ---
-        {content_for_analysis[:1500]}
-        ---
-        
-        JSON format:
-        {{
-            "trends": [
-                {{ "trend_name": "US-India Trade Deal", "relevant_articles": ["Article Title 1"] }}
-            ]
-        }}
-        """
-        
-        response_json = call_groq_api_http(system_prompt, user_prompt)
-        if response_json and 'trends' in response_json and isinstance(response_json['trends'], list):
-            all_trends.extend(response_json['trends'])
-        
-        # Wait between batches to avoid rate limits
-        if i < num_batches - 1:
-            logger.info("Waiting 20 seconds before next batch...")
-            time.sleep(20)
+def analyze_articles_incrementally(articles, batch_size=BATCH_MAX_ARTICLES, progress=None):
+    """
+    Analyzes only the articles without a stored result, then rebuilds the
+    preliminary trends for the whole set from the per-article results.
 
-    return all_trends
+    Articles from batches that failed are left unrecorded, so the next run
+    tries them again. progress works as in analyze_articles_in_batches.
+    """
+    fresh = unanalyzed_articles(articles)
+    if fresh:
+        batches = pack_batches(fresh, max_articles=batch_size)
+        for index, batch, trends in iter_batch_analysis(batches):
+            if trends is not None:
+                record_batch_analysis(batch, trends)
+            if progress is not None:
+                progress("batch", batch_progress_event(index, len(batches), batch, trends))
 
-def consolidate_trends(trends_list):
+    return group_recorded_trends(articles)
+
+def unanalyzed_articles(articles):
+    """The articles without a stored per-article result."""
+    fresh = [article for article in articles if article_analysis.get(article['link']) is None]
+    logger.info(f"{len(articles) - len(fresh)} articles already analyzed, sending {len(fresh)} to Groq")
+    return fresh
+
+def group_recorded_trends(articles):
     """
-    Takes a list of trends from all batches and performs a final analysis.
+    Preliminary trends for articles, rebuilt from their stored per-article
+    results.
     """
-    if not trends_list:
-        return None
+    grouped = OrderedDict()
+    for article in articles:
+        for name in article_analysis.get(article['link']) or []:
+            grouped.setdefault(name, []).append(article['title'])
 
-    logger.info("Consolidating all trends for final report with Groq")
-    
-    consolidated_text = ""
-    for trend in trends_list:
-        if isinstance(trend, dict):
-             consolidated_text += f"Trend: {trend.get('trend_name', 'N/A')}\n"
-             articles = trend.get('relevant_articles', [])
-             if isinstance(articles, list) and articles:
-                  consolidated_text += f"Articles: {articles[0]}\n\n"  # Just first article to save tokens
+    return [{"trend_name": name, "relevant_articles": titles} for name, titles in grouped.items()]
 
-    system_prompt = "You synthesize India-US relations trends. Respond ONLY with valid JSON containing 'report' array."
-    user_prompt = f"""
+CONSOLIDATION_SYSTEM_PROMPT = "You synthesize India-US relations trends. Respond ONLY with valid JSON containing 'report' array."
+
+def consolidation_user_prompt(consolidated_text):
+    return f"""
     Synthesize top 5 India-US trends from this data. Merge similar topics.
     
     Data:
     ---
-    {consolidated_text[:1000]}  
+    {consolidated_text}
     ---
     
     JSON format:
@@ -244,14 +1803,718 @@ def consolidate_trends(trends_list):
         ]
     }}
     """
-    
-    response_json = call_groq_api_http(system_prompt, user_prompt)
+
+def format_trend_for_prompt(trend):
+    """The text one preliminary trend contributes to the consolidation prompt."""
+    text = f"Trend: {trend.get('trend_name', 'N/A')}\n"
+    articles = trend.get('relevant_articles', [])
+    if isinstance(articles, list) and articles:
+        text += "Articles:\n" + "".join(f"- {title}\n" for title in articles)
+    return text + "\n"
+
+def build_consolidation_prompt(trends_list):
+    """
+    Builds the (system, user) prompt pair for the final consolidation call.
+
+    Trends go in whole, with every article title, in order until the prompt
+    budget (see prompt_token_budget) is used up; any that do not fit are
+    logged rather than cut off mid-way.
+    """
+    budget = prompt_token_budget(CONSOLIDATION_SYSTEM_PROMPT + consolidation_user_prompt(""))
+    parts = []
+    used = 0
+    dropped = []
+    for trend in trends_list:
+        if not isinstance(trend, dict):
+            continue
+        text = format_trend_for_prompt(trend)
+        tokens = estimate_tokens(text)
+        if used + tokens > budget:
+            dropped.append(str(trend.get('trend_name', 'N/A')))
+            continue
+        parts.append(text)
+        used += tokens
+
+    if dropped:
+        logger.warning(
+            f"Consolidation prompt full at {used} of {budget} tokens; left out {len(dropped)} of "
+            f"{len(trends_list)} trends: {', '.join(dropped)}"
+        )
+    return CONSOLIDATION_SYSTEM_PROMPT, consolidation_user_prompt("".join(parts))
+
+def consolidate_trends(trends_list):
+    """
+    Takes a list of trends from all batches and performs a final analysis.
+    """
+    if not trends_list:
+        return None
+
+    logger.info("Consolidating all trends for final report with Groq")
+
+    return parse_consolidation_response(call_groq_api_http(*build_consolidation_prompt(trends_list)))
+
+def parse_consolidation_response(response_json):
+    """The report list from a consolidation response, or None if it is missing."""
     if response_json and 'report' in response_json:
         return response_json['report']
     return None
 
+# --- Article preprocessing ---
+def canonical_link(link):
+    """
+    Normalizes a link for duplicate detection: no scheme, fragment, "www."
+    prefix, trailing slash or tracking parameters.
+    """
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_QUERY_PARAMS
+    ]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{urlencode(sorted(query))}" if query else f"{host}{path}"
+
+def simhash(text):
+    """64-bit SimHash of a text's words, ignoring stopwords."""
+    words = [word for word in re.findall(r"\w+", text.lower()) if word not in SIMHASH_STOPWORDS]
+    weights = [0] * 64
+    for feature in words:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def deduplicate_articles(articles, max_distance=None):
+    """
+    Collapses copies of the same story across feeds, keeping the first
+    article of each cluster (the newest, given store ordering).
+
+    Exact duplicates share a canonical link. Near duplicates are found by
+    SimHash: fingerprints are split into max_distance + 1 bands, so any two
+    within max_distance bits agree on at least one band and only articles
+    sharing a band bucket get compared. Returns (unique_articles, stats).
+    """
+    max_distance = NEAR_DUPLICATE_DISTANCE if max_distance is None else max_distance
+
+    by_link = {}
+    for article in articles:
+        by_link.setdefault(canonical_link(article['link']), article)
+    unique = list(by_link.values())
+    link_duplicates = len(articles) - len(unique)
+
+    near_duplicates = 0
+    if max_distance >= 0 and len(unique) > 1:
+        bands = max_distance + 1
+        band_bits = -(-64 // bands)
+        band_mask = (1 << band_bits) - 1
+        buckets = {}
+        kept = []
+        for article in unique:
+            fingerprint = simhash(f"{article['title']} {article['summary'] or ''}")
+            keys = [(band, fingerprint >> (band * band_bits) & band_mask) for band in range(bands)]
+            candidates = {other for key in keys for other in buckets.get(key, ())}
+            if any(bin(fingerprint ^ other).count("1") <= max_distance for other in candidates):
+                near_duplicates += 1
+                continue
+            for key in keys:
+                buckets.setdefault(key, []).append(fingerprint)
+            kept.append(article)
+        unique = kept
+
+    tokens_before = sum(estimate_tokens(format_article_for_prompt(article)) for article in articles)
+    tokens_after = sum(estimate_tokens(format_article_for_prompt(article)) for article in unique)
+    stats = {
+        "articles_in": len(articles),
+        "articles_out": len(unique),
+        "link_duplicates": link_duplicates,
+        "near_duplicates": near_duplicates,
+        "estimated_tokens_saved": tokens_before - tokens_after
+    }
+    if len(unique) < len(articles):
+        logger.info(f"Deduplicated {len(articles)} articles to {len(unique)}, saving ~{stats['estimated_tokens_saved']} prompt tokens")
+    return unique, stats
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+
+    find() reports every keyword occurrence in a single pass over the text,
+    so the cost of scanning an article does not grow with the dictionary.
+    """
+
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, label)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword, label in keywords:
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((len(keyword), label))
+
+        # Breadth-first, so every failure target is built before it is used.
+        # Depth-one states keep the root as their failure link.
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, child in self._goto[state].items():
+                pending.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """Yields (start, end, label) for every keyword occurrence in text."""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, label in self._output[state]:
+                yield index - length + 1, index + 1, label
+
+class RelevanceFilter:
+    """
+    Scores text by how many keywords of each group it mentions, counting
+    only whole-word matches.
+
+    Each stretch of text counts once, for the longest keyword matching there
+    ("US Congress" rather than "US"). A keyword listed under several groups
+    is moved to the shared group, which adds to the score but is not needed
+    for relevance.
+    """
+
+    def __init__(self, keywords_by_group):
+        self.groups = list(keywords_by_group)
+        if RELEVANCE_SHARED_GROUP not in self.groups:
+            self.groups.append(RELEVANCE_SHARED_GROUP)
+
+        groups_of = {}
+        for group, keywords in keywords_by_group.items():
+            for keyword in keywords:
+                groups_of.setdefault(keyword, set()).add(group)
+
+        exact, folded = [], []
+        for keyword, groups in groups_of.items():
+            group = groups.pop() if len(groups) == 1 else RELEVANCE_SHARED_GROUP
+            if keyword.isupper():
+                exact.append((keyword, group))
+            else:
+                folded.append((keyword.lower(), group))
+        self._exact = KeywordAutomaton(exact)
+        self._folded = KeywordAutomaton(folded)
+
+    def score(self, text):
+        matches = []
+        for automaton, haystack in ((self._exact, text), (self._folded, text.lower())):
+            for start, end, group in automaton.find(haystack):
+                before = haystack[start - 1] if start > 0 else " "
+                after = haystack[end] if end < len(haystack) else " "
+                if not before.isalnum() and not after.isalnum():
+                    matches.append((start, -end, group))
+
+        # Leftmost-longest: a match inside or overlapping a counted one is skipped
+        counts = dict.fromkeys(self.groups, 0)
+        covered = 0
+        for start, negative_end, group in sorted(matches):
+            if start >= covered:
+                counts[group] += 1
+                covered = -negative_end
+        return counts
+
+    def is_relevant(self, article):
+        counts = self.score(f"{article['title']}\n{article['summary'] or ''}")
+        return all(count for group, count in counts.items() if group != RELEVANCE_SHARED_GROUP)
+
+def load_relevance_keywords():
+    if RELEVANCE_KEYWORDS_PATH:
+        try:
+            with open(RELEVANCE_KEYWORDS_PATH, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load relevance keywords from {RELEVANCE_KEYWORDS_PATH}: {e}")
+    return DEFAULT_RELEVANCE_KEYWORDS
+
+relevance_filter = RelevanceFilter(load_relevance_keywords())
+
+def filter_relevant_articles(articles):
+    """
+    Keeps the articles that mention every keyword group other than the
+    shared one (by default: both India and the US). Returns
+    (relevant_articles, stats).
+    """
+    relevant = [article for article in articles if relevance_filter.is_relevant(article)]
+    logger.info(f"Relevance filter kept {len(relevant)} of {len(articles)} articles")
+    return relevant, {"articles_in": len(articles), "articles_out": len(relevant)}
+
+def select_articles(articles, limit=MAX_ARTICLES_ANALYZED, token_budget=ARTICLE_TOKEN_BUDGET):
+    """
+    Picks up to limit articles whose prompt text fits in token_budget,
+    best first.
+
+    Each article's base score is recency decay times keyword relevance.
+    Selection is greedy: every round takes the best remaining article that
+    still fits the budget, after discounting sources already picked, so
+    one prolific feed cannot take every slot. Each round is a vectorized
+    pass over all candidates. Returns (selected_articles, stats).
+    """
+    if not articles:
+        return [], {"articles_in": 0, "articles_out": 0, "estimated_tokens": 0}
+
+    now = datetime.now()
+    ages = np.array([
+        (now - datetime.fromisoformat(article['published'])).total_seconds() / 3600
+        if article.get('published') else ARTICLE_RETENTION_HOURS
+        for article in articles
+    ])
+    keyword_hits = np.array([
+        sum(relevance_filter.score(f"{article['title']}\n{article['summary'] or ''}").values())
+        for article in articles
+    ])
+    tokens = np.array([estimate_tokens(format_article_for_prompt(article)) for article in articles])
+    _, source_ids = np.unique([article['source'] for article in articles], return_inverse=True)
+
+    base_scores = np.exp2(-np.clip(ages, 0, None) / RECENCY_HALF_LIFE_HOURS) * np.log1p(keyword_hits + 1)
+    picked_per_source = np.zeros(source_ids.max() + 1)
+    available = np.ones(len(articles), dtype=bool)
+    remaining = token_budget
+    selected = []
+
+    for _ in range(min(limit, len(articles))):
+        scores = base_scores * SOURCE_DIVERSITY_PENALTY ** picked_per_source[source_ids]
+        scores[~available | (tokens > remaining)] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] == -np.inf:
+            break
+        selected.append(best)
+        available[best] = False
+        remaining -= tokens[best]
+        picked_per_source[source_ids[best]] += 1
+
+    stats = {
+        "articles_in": len(articles),
+        "articles_out": len(selected),
+        "estimated_tokens": int(token_budget - remaining)
+    }
+    logger.info(f"Selected {len(selected)} of {len(articles)} articles (~{stats['estimated_tokens']} prompt tokens)")
+    return [articles[index] for index in selected], stats
+
+def article_fingerprint(articles):
+    """
+    Hashes the titles and links of an article set, independent of order.
+    """
+    digest = hashlib.sha256()
+    for title, link in sorted((article['title'], article['link']) for article in articles):
+        digest.update(f"{title}\n{link}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def build_trends_report(articles, batch_size=BATCH_MAX_ARTICLES, progress=None):
+    """
+    Runs the Groq pipeline over articles and attaches full article details to
+    each consolidated trend.
+    """
+    with TRENDS_STAGE_SECONDS.labels(stage="analysis").time():
+        if INCREMENTAL_ANALYSIS:
+            preliminary_trends = analyze_articles_incrementally(articles, batch_size=batch_size, progress=progress)
+        else:
+            preliminary_trends = analyze_articles_in_batches(articles, batch_size=batch_size, progress=progress)
+    with TRENDS_STAGE_SECONDS.labels(stage="consolidation").time():
+        final_trends = consolidate_trends(preliminary_trends)
+    with TRENDS_STAGE_SECONDS.labels(stage="enrich").time():
+        return enrich_trends(final_trends, articles)
+
+def enrich_trends(final_trends, articles):
+    """
+    Replaces the titles in each consolidated trend with the full articles
+    they refer to.
+    """
+    # Resolve every title the LLM returned in one batched similarity lookup
+    trends = [trend for trend in final_trends or [] if isinstance(trend, dict)]
+    titles_per_trend = [
+        trend.get('relevant_articles') if isinstance(trend.get('relevant_articles'), list) else []
+        for trend in trends
+    ]
+    matches = iter(TitleMatcher(articles).match([title for titles in titles_per_trend for title in titles]))
+
+    # Enhance trends with full article information
+    enhanced_trends = []
+    for trend, titles in zip(trends, titles_per_trend):
+        enhanced_trend = {
+            "trend_name": trend.get('trend_name', 'N/A'),
+            "explanation": trend.get('explanation', 'No explanation provided.'),
+            "relevant_articles": []
+        }
+
+        for title in titles:
+            article = next(matches)
+            if article is not None:
+                enhanced_trend["relevant_articles"].append(article)
+            else:
+                # If no close match is found, add as title only
+                enhanced_trend["relevant_articles"].append({
+                    "title": title,
+                    "link": "# (Link not found)",
+                    "summary": "Article details not available",
+                    "published": None,
+                    "source": "Unknown"
+                })
+
+        enhanced_trends.append(enhanced_trend)
+
+    return enhanced_trends
+
+def compute_trends(cache_key, articles, batch_size, progress=None):
+    """
+    Returns the cached report for cache_key, building and caching it if needed.
+    """
+    enhanced_trends = trends_cache.get(cache_key)
+    if enhanced_trends is None:
+        enhanced_trends = build_trends_report(articles, batch_size=batch_size, progress=progress)
+        store_trends_report(cache_key, enhanced_trends)
+    return enhanced_trends
+
+def store_trends_report(cache_key, enhanced_trends):
+    """Caches a freshly built report under cache_key."""
+    # Empty reports usually mean Groq failed; don't pin them in the cache
+    if enhanced_trends:
+        trends_cache.set(cache_key, enhanced_trends)
+
+def get_trends_payload(hours_back, batch_size, progress=None):
+    """
+    Builds the /trends response body for the given parameters.
+
+    If given, progress(event, data) receives an "articles" event once the
+    articles are known and a "batch" event per analyzed batch.
+    """
+    # Get articles
+    with TRENDS_STAGE_SECONDS.labels(stage="articles").time():
+        articles = get_recent_articles(hours_back)
+    with TRENDS_STAGE_SECONDS.labels(stage="prepare").time():
+        articles, stats, message = prepare_trends_articles(articles)
+    if message:
+        return empty_trends_payload(message, stats)
+
+    if progress is not None:
+        progress("articles", {"hours_back": hours_back, "articles_analyzed": len(articles)})
+
+    # Analyze trends, reusing a recent result for the same article set
+    cache_key = (hours_back, batch_size, article_fingerprint(articles))
+    enhanced_trends = trends_cache.get(cache_key)
+    if enhanced_trends is not None:
+        return finish_trends_payload(hours_back, batch_size, articles, stats, enhanced_trends, cached=True)
+    # While Groq is down, answer straight away rather than run a pipeline that can only fail
+    if groq_breaker.is_open():
+        return degraded_trends_payload(hours_back, batch_size, articles, stats)
+    # Concurrent identical requests share one pipeline run
+    enhanced_trends, coalesced = trends_flight.do(cache_key, compute_trends, cache_key, articles, batch_size, progress)
+    return finish_trends_payload(hours_back, batch_size, articles, stats, enhanced_trends, coalesced=coalesced)
+
+def finish_trends_payload(hours_back, batch_size, articles, stats, enhanced_trends, cached=False, coalesced=False):
+    """
+    The /trends body once a report is in hand, from the cache or a pipeline
+    run. An empty report because the circuit breaker opened mid-run gets the
+    degraded answer; a good one is kept as the stale fallback.
+    """
+    if not enhanced_trends and groq_breaker.is_open():
+        return degraded_trends_payload(hours_back, batch_size, articles, stats)
+
+    payload = trends_payload(hours_back, articles, enhanced_trends, cached, stats, coalesced)
+    if enhanced_trends:
+        stale_trends.set((hours_back, batch_size), payload)
+    return payload
+
+def prepare_trends_articles(articles):
+    """
+    Deduplicates, filters and ranks fetched articles for analysis.
+
+    Returns (articles, stats, message), where message explains why nothing
+    is left to analyze.
+    """
+    stats = {"deduplication": None, "relevance_filter": None, "selection": None}
+    if not articles:
+        return [], stats, "No recent articles found"
+
+    # Send each story to Groq once, however many feeds carried it
+    articles, stats["deduplication"] = deduplicate_articles(articles)
+
+    # Only stories mentioning both countries can produce an India-US trend
+    if RELEVANCE_FILTER:
+        articles, stats["relevance_filter"] = filter_relevant_articles(articles)
+        if not articles:
+            return [], stats, "No recent articles mention both India and the US"
+
+    # Spend the fixed LLM budget on the most promising articles, not just the first feed's
+    articles, stats["selection"] = select_articles(articles)
+    return articles, stats, None
+
+def empty_trends_payload(message, stats):
+    return {
+        "success": True,
+        "message": message,
+        "trends": [],
+        "articles_analyzed": 0,
+        **{name: value for name, value in stats.items() if value is not None},
+        "timestamp": datetime.now().isoformat()
+    }
+
+def trends_payload(hours_back, articles, enhanced_trends, cached, stats, coalesced=False):
+    return {
+        "success": True,
+        "trends_count": len(enhanced_trends),
+        "articles_analyzed": len(articles),
+        "hours_back": hours_back,
+        "trends": enhanced_trends,
+        "cached": cached,
+        "coalesced": coalesced,
+        **stats,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def degraded_trends_payload(hours_back, batch_size, articles, stats):
+    """
+    /trends body for when the Groq circuit is open: the last good response
+    for the same parameters, or else preliminary trends rebuilt from stored
+    per-article results, without the consolidation call.
+    """
+    stale = stale_trends.get((hours_back, batch_size))
+    if stale is not None:
+        TRENDS_DEGRADED.labels(source="stale").inc()
+        return {
+            **stale,
+            "cached": True,
+            "coalesced": False,
+            "degraded": True,
+            "message": "Groq is unavailable; showing the last complete analysis",
+            "generated_at": stale['timestamp'],
+            "timestamp": datetime.now().isoformat()
+        }
+
+    TRENDS_DEGRADED.labels(source="recorded").inc()
+    enhanced_trends = enrich_trends(group_recorded_trends(articles), articles)
+    if enhanced_trends:
+        message = "Groq is unavailable; showing unconsolidated trends from earlier batch analysis"
+    else:
+        message = "Groq is unavailable and no earlier analysis of these articles is stored"
+    return {
+        **trends_payload(hours_back, articles, enhanced_trends, False, stats),
+        "degraded": True,
+        "message": message
+    }
+
+class MemoryJobStore:
+    """/trends/jobs records held in this worker process only."""
+
+    def __init__(self, retention):
+        self._jobs = TTLCache(maxsize=1000, ttl=retention)
+
+    def save(self, job):
+        self._jobs.set(job['job_id'], dict(job))
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+class SQLiteJobStore:
+    """
+    /trends/jobs records in a SQLite database shared by every worker process
+    on the host, so a job can be polled through any worker.
+
+    Each job is one row holding the job dict as JSON, rewritten whenever the
+    worker running it updates its status. Rows older than retention seconds
+    are swept on submission and never returned. A queued or running job
+    whose worker process has exited (killed, or recycled by gunicorn) is
+    reported as "lost" instead of staying "running" until it expires.
+    """
+
+    def __init__(self, path, retention):
+        self.path = path
+        self.retention = retention
+        self._connections = SQLiteConnections(path)
+        self._connections.get().execute(
+            "CREATE TABLE IF NOT EXISTS trends_jobs (job_id TEXT PRIMARY KEY, submitted REAL NOT NULL, job TEXT NOT NULL)"
+        )
+
+    def save(self, job):
+        conn = self._connections.get()
+        now = time.time()
+        row = conn.execute("SELECT submitted FROM trends_jobs WHERE job_id = ?", (job['job_id'],)).fetchone()
+        if row is None:
+            conn.execute("DELETE FROM trends_jobs WHERE submitted <= ?", (now - self.retention,))
+        conn.execute(
+            "INSERT OR REPLACE INTO trends_jobs (job_id, submitted, job) VALUES (?, ?, ?)",
+            (job['job_id'], row[0] if row else now, json.dumps(job))
+        )
+
+    def get(self, job_id):
+        row = self._connections.get().execute(
+            "SELECT job FROM trends_jobs WHERE job_id = ? AND submitted > ?",
+            (job_id, time.time() - self.retention)
+        ).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[0])
+        # Records written before worker_pid was stored have no owner to check
+        if job['status'] in ("queued", "running") and job.get('worker_pid') and not process_alive(job['worker_pid']):
+            job['status'] = "lost"
+            job['error'] = f"Worker process {job['worker_pid']} exited before the job finished"
+            job['finished_at'] = datetime.now().isoformat()
+            self.save(job)
+        return job
+
+def process_alive(pid):
+    """Whether a process with this pid is running on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def new_trends_job(hours_back, batch_size):
+    """Creates and stores the record of a queued /trends/jobs job."""
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "status": "queued",
+        "hours_back": hours_back,
+        "batch_size": batch_size,
+        "worker_pid": os.getpid(),
+        "submitted_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None
+    }
+    trends_jobs.save(job)
+    return job
+
+def run_trends_job(job):
+    """
+    Executes a queued /trends/jobs job and records its outcome in trends_jobs.
+    """
+    job['status'] = "running"
+    job['started_at'] = datetime.now().isoformat()
+    trends_jobs.save(job)
+    try:
+        job['result'] = get_trends_payload(job['hours_back'], job['batch_size'])
+        job['status'] = "done"
+    except Exception as e:
+        logger.error(f"Trends job {job['job_id']} failed: {e}")
+        job['error'] = str(e)
+        job['status'] = "failed"
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+        trends_jobs.save(job)
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_trends_events(hours_back, batch_size):
+    """
+    Runs the trends pipeline on a helper thread and yields its progress as
+    Server-Sent Events: "articles", one "batch" per analyzed batch, then
+    "report" with the same body /trends returns (or "error").
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            payload = get_trends_payload(hours_back, batch_size, progress=lambda event, data: events.put((event, data)))
+            events.put(("report", payload))
+        except Exception as e:
+            logger.error(f"Error in trends stream: {e}")
+            events.put(("error", {"success": False, "error": str(e), "timestamp": datetime.now().isoformat()}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name="trends-stream", daemon=True).start()
+
+    while True:
+        try:
+            item = events.get(timeout=SSE_HEARTBEAT_SECONDS)
+        except queue.Empty:
+            # SSE comment line; keeps proxies from closing an idle stream
+            yield ": keep-alive\n\n"
+            continue
+        if item is None:
+            break
+        yield format_sse(*item)
+
+trends_cache = TTLCache(maxsize=TRENDS_CACHE_SIZE, ttl=TRENDS_CACHE_TTL)
+stale_trends = TTLCache(maxsize=TRENDS_CACHE_SIZE, ttl=TRENDS_STALE_TTL)
+trends_flight = SingleFlight()
+if TRENDS_JOB_DB_PATH:
+    trends_jobs = SQLiteJobStore(TRENDS_JOB_DB_PATH, TRENDS_JOB_RETENTION)
+else:
+    trends_jobs = MemoryJobStore(TRENDS_JOB_RETENTION)
+trends_job_executor = ThreadPoolExecutor(max_workers=TRENDS_JOB_WORKERS, thread_name_prefix="trends-job")
+
 # --- API Routes ---
 
+if PROFILE_TOKEN:
+    @app.before_request
+    def start_profiling():
+        if request.endpoint not in PROFILE_EXCLUDED_ENDPOINTS and profile_token_valid():
+            g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+    @app.after_request
+    def finish_profiling(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profile_id = new_profile_id(request.endpoint or "unknown")
+            response.headers['X-Profile-Id'] = profile_id
+            if response.is_streamed:
+                # A streamed body is generated after this hook; keep sampling until it is sent
+                response.call_on_close(lambda: finish_profile(profiler, profile_id))
+            else:
+                finish_profile(profiler, profile_id)
+        return response
+
+    @app.teardown_request
+    def discard_profiling(error):
+        # Only left over when the request failed before after_request ran
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+
+API_ENDPOINTS = {
+    "/trends": "GET - Get trending India-US news topics",
+    "/trends/stream": "GET - Trends analysis progress as Server-Sent Events",
+    "/trends/jobs": "POST - Queue a trends analysis, returns a job id",
+    "/trends/jobs/<job_id>": "GET - Status and result of a queued analysis",
+    "/articles": "GET - Get recent articles from feeds",
+    "/health": "GET - Health check",
+    "/stats": "GET - Cache and request coalescing counters",
+    "/metrics": "GET - Prometheus metrics",
+    "/profiles/<profile_id>": "GET - Collapsed-stack profile of a request (requires X-Profile-Token)"
+}
+
+def health_payload():
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "groq_api_configured": bool(GROQ_API_KEY and GROQ_API_KEY != "PASTE_YOUR_GROQ_API_KEY_HERE"),
+        "groq_circuit": groq_breaker.state,
+        "ingestion": {
+            "enabled": bool(INGEST_INTERVAL),
+            "archive": ARTICLE_ARCHIVE_PATH or None,
+            "interval_seconds": INGEST_INTERVAL,
+            "articles_stored": len(article_store),
+            "last_poll": feed_ingestor.last_poll.isoformat() if feed_ingestor.last_poll else None
+        }
+    }
+
 @app.route('/', methods=['GET'])
 def home():
     """Health check endpoint"""
@@ -259,22 +2522,57 @@ def home():
         "message": "India-US News Trends API",
         "version": "1.0",
         "status": "active",
-        "endpoints": {
-            "/trends": "GET - Get trending India-US news topics",
-            "/articles": "GET - Get recent articles from feeds",
-            "/health": "GET - Health check"
-        }
+        "endpoints": API_ENDPOINTS
     })
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    return jsonify(health_payload())
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Cache and request coalescing counters for this worker process"""
     return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "groq_api_configured": bool(GROQ_API_KEY and GROQ_API_KEY != "PASTE_YOUR_GROQ_API_KEY_HERE")
+        "pid": os.getpid(),
+        "trends_cache": {"entries": len(trends_cache)},
+        "trends_singleflight": trends_flight.stats(),
+        "feed_singleflight": feed_flight.stats(),
+        "groq_connections": groq_connection_stats(),
+        "groq_circuit": groq_breaker.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+        "rate_limit": rate_limit_backend.stats(),
+        "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics for the trends pipeline"""
+    return Response(metrics_payload(), content_type=CONTENT_TYPE_LATEST)
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Download a saved request profile in collapsed-stack format"""
+    if not profile_token_valid():
+        return jsonify({
+            "success": False,
+            "error": "Forbidden",
+            "message": "Profiling is disabled or the X-Profile-Token header is wrong",
+            "timestamp": datetime.now().isoformat()
+        }), 403
+
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.collapsed")
+    if not re.fullmatch(r'[\w-]+', profile_id) or not os.path.exists(path):
+        return jsonify({
+            "success": False,
+            "error": "Profile not found",
+            "message": "Unknown profile id, or the profile has been pruned",
+            "timestamp": datetime.now().isoformat()
+        }), 404
+
+    with open(path, encoding="utf-8") as f:
+        return Response(f.read(), mimetype="text/plain")
+
 @app.route('/articles', methods=['GET'])
 @rate_limit(max_requests=5, per_minutes=10)
 def get_articles():
@@ -283,7 +2581,7 @@ def get_articles():
         hours_back = request.args.get('hours', 72, type=int)
         hours_back = min(max(hours_back, 1), 168)  # Limit between 1 and 168 hours (1 week)
         
-        articles = get_articles_from_feeds(RSS_FEEDS, hours_back=hours_back)
+        articles = get_recent_articles(hours_back)
         
         return jsonify({
             "success": True,
@@ -302,91 +2600,98 @@ def get_articles():
         }), 500
 
 @app.route('/trends', methods=['GET'])
-@rate_limit(max_requests=2, per_minutes=60)
+@trends_rate_limit
 def get_trends():
     """Get trending India-US news topics"""
     try:
         hours_back = request.args.get('hours', 72, type=int)
         hours_back = min(max(hours_back, 1), 168)  # Limit between 1 and 168 hours
         
-        batch_size = request.args.get('batch_size', 10, type=int)
-        batch_size = min(max(batch_size, 5), 15)  # Even smaller batch size
-        
-        # Get articles
-        articles = get_articles_from_feeds(RSS_FEEDS, hours_back=hours_back)
-        
-        if not articles:
-            return jsonify({
-                "success": True,
-                "message": "No recent articles found",
-                "trends": [],
-                "articles_analyzed": 0,
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        # Limit articles to avoid timeout (even more conservative)
-        if len(articles) > 30:
-            articles = articles[:30]
-            logger.info(f"Limited to first 30 articles to avoid timeout")
-        
-        # Analyze trends
-        preliminary_trends = analyze_articles_in_batches(articles, batch_size=batch_size)
-        final_trends = consolidate_trends(preliminary_trends)
-        
-        # Create article lookup dictionary
-        article_dict = {article['title']: article for article in articles}
-        
-        # Enhance trends with full article information
-        enhanced_trends = []
-        if final_trends:
-            for trend in final_trends:
-                if isinstance(trend, dict):
-                    enhanced_trend = {
-                        "trend_name": trend.get('trend_name', 'N/A'),
-                        "explanation": trend.get('explanation', 'No explanation provided.'),
-                        "relevant_articles": []
-                    }
-                    
-                    relevant_articles = trend.get('relevant_articles', [])
-                    if isinstance(relevant_articles, list):
-                        for title in relevant_articles:
-                            if title in article_dict:
-                                enhanced_trend["relevant_articles"].append(article_dict[title])
-                            else:
-                                # If exact match not found, add as title only
-                                enhanced_trend["relevant_articles"].append({
-                                    "title": title,
-                                    "link": "# (Link not found)",
-                                    "summary": "Article details not available",
-                                    "published": None,
-                                    "source": "Unknown"
-                                })
-                    
-                    enhanced_trends.append(enhanced_trend)
+        batch_size = request.args.get('batch_size', BATCH_MAX_ARTICLES, type=int)
+        batch_size = min(max(batch_size, 5), BATCH_MAX_ARTICLES)
         
+        return jsonify(get_trends_payload(hours_back, batch_size))
+    
+    except Exception as e:
+        logger.error(f"Error in get_trends: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+
+@app.route('/trends/stream', methods=['GET'])
+@trends_rate_limit
+def stream_trends():
+    """Stream trends analysis progress as Server-Sent Events"""
+    hours_back = request.args.get('hours', 72, type=int)
+    hours_back = min(max(hours_back, 1), 168)  # Limit between 1 and 168 hours
+
+    batch_size = request.args.get('batch_size', BATCH_MAX_ARTICLES, type=int)
+    batch_size = min(max(batch_size, 5), BATCH_MAX_ARTICLES)
+
+    return Response(
+        stream_trends_events(hours_back, batch_size),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/trends/jobs', methods=['POST'])
+@trends_rate_limit
+def submit_trends_job():
+    """Queue a trends analysis and return a job id immediately"""
+    try:
+        hours_back = request.args.get('hours', 72, type=int)
+        hours_back = min(max(hours_back, 1), 168)  # Limit between 1 and 168 hours
+
+        batch_size = request.args.get('batch_size', BATCH_MAX_ARTICLES, type=int)
+        batch_size = min(max(batch_size, 5), BATCH_MAX_ARTICLES)
+
+        job = new_trends_job(hours_back, batch_size)
+        # run_trends_job updates job on another thread from here on
+        queued = dict(job)
+        trends_job_executor.submit(run_trends_job, job)
+
         return jsonify({
             "success": True,
-            "trends_count": len(enhanced_trends),
-            "articles_analyzed": len(articles),
-            "hours_back": hours_back,
-            "trends": enhanced_trends,
+            "job_id": queued['job_id'],
+            "status": queued['status'],
+            "status_url": f"/trends/jobs/{queued['job_id']}",
             "timestamp": datetime.now().isoformat()
-        })
-    
+        }), 202
+
     except Exception as e:
-        logger.error(f"Error in get_trends: {e}")
+        logger.error(f"Error in submit_trends_job: {e}")
         return jsonify({
             "success": False,
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@app.route('/trends/jobs/<job_id>', methods=['GET'])
+def get_trends_job(job_id):
+    """Get the status, and once finished the result, of a trends job"""
+    job = trends_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found",
+            "message": "Unknown job id, or the job has expired",
+            "timestamp": datetime.now().isoformat()
+        }), 404
+
+    return jsonify({
+        "success": job['status'] not in ("failed", "lost"),
+        **job,
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
         "success": False,
         "error": "Endpoint not found",
-        "available_endpoints": ["/", "/health", "/articles", "/trends"]
+        "available_endpoints": ["/", "/health", "/stats", "/metrics", "/articles", "/trends", "/trends/stream", "/trends/jobs"]
     }), 404
 
 @app.errorhandler(500)
@@ -0,0 +1,562 @@
+"""
+ASGI serving mode for the trends API.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+
+Routes, responses and configuration are the same as app.py. The difference
+is that feed downloads and Groq calls are awaited on an event loop instead
+of each holding a thread, so one worker can keep hundreds of slow /trends
+requests in flight. The CPU-bound steps (feed parsing, deduplication,
+ranking, title matching) and all shared state (caches, rate limiter, article
+store, metrics) come straight from app.py. With uvicorn --workers, set
+PROMETHEUS_MULTIPROC_DIR to an empty directory so /metrics covers every worker.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as trends_app
+
+logger = logging.getLogger(__name__)
+
+# HTTP clients, opened and closed with the application
+feed_client = None
+groq_client = None
+
+# Batches in flight to Groq from this worker, as groq_executor bounds them in app.py
+groq_slots = asyncio.Semaphore(trends_app.GROQ_MAX_CONCURRENCY)
+job_slots = asyncio.Semaphore(trends_app.TRENDS_JOB_WORKERS)
+
+# Tasks that outlive the request that started them (jobs, abandoned streams)
+background_tasks = set()
+
+def spawn(coro):
+    task = asyncio.ensure_future(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines: concurrent callers with the same key await
+    one shared task. The task is shielded, so a caller that disconnects does
+    not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Returns (result, shared), where shared is True for followers."""
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task), shared
+
+    def stats(self):
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
+
+trends_flight = AsyncSingleFlight()
+feed_flight = AsyncSingleFlight()
+
+# --- Feed fetching ---
+async def fetch_feed(url, timeout=None):
+    """
+    Downloads a single feed and parses it on a worker thread.
+
+    Same contract as app.fetch_feed: the timeout covers the whole download,
+    the body is capped at FEED_MAX_BYTES, and a 304 returns the feed parsed
+    last time.
+    """
+    timeout = trends_app.FEED_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    previous = trends_app.feed_validators.get(url)
+
+    async with asyncio.timeout(timeout):
+        async with feed_client.stream("GET", url, headers=trends_app.feed_request_headers(url)) as response:
+            if response.status_code == 304 and previous:
+                trends_app.FEED_FETCH_SECONDS.labels(feed=url).observe(time.monotonic() - started)
+                logger.info(f"Feed {url} not modified since last poll")
+                return previous['feed']
+
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes(16384):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > trends_app.FEED_MAX_BYTES:
+                    raise ValueError(f"Feed body exceeds {trends_app.FEED_MAX_BYTES} bytes")
+    trends_app.FEED_FETCH_SECONDS.labels(feed=url).observe(time.monotonic() - started)
+
+    return await asyncio.to_thread(trends_app.parse_feed_body, url, b"".join(chunks), response.headers, str(response.url))
+
+async def get_articles_from_feeds(feed_urls, hours_back=72, deadline=None):
+    """
+    Fetches all feeds concurrently; feeds still running at the deadline are
+    skipped. Articles keep the order of feed_urls.
+    """
+    lookback_period = datetime.now() - timedelta(hours=hours_back)
+    deadline = trends_app.FEED_DEADLINE if deadline is None else deadline
+
+    logger.info(f"Fetching articles from feeds (looking back {hours_back} hours)...")
+
+    tasks = {url: asyncio.ensure_future(fetch_feed(url)) for url in feed_urls}
+    pending = set()
+    if tasks:
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+
+    all_articles = []
+    for url, task in tasks.items():
+        if task in pending:
+            task.cancel()
+            logger.error(f"Feed {url} did not finish within the {deadline} second deadline")
+            continue
+        try:
+            all_articles.extend(trends_app.parse_feed_articles(task.result(), url, lookback_period))
+        except Exception as e:
+            logger.error(f"Error fetching or parsing feed {url}: {e}")
+
+    logger.info(f"Found {len(all_articles)} new articles from the last {hours_back} hours.")
+    return all_articles
+
+async def get_recent_articles(hours_back):
+    """
+    Returns recent articles from the ingestion store, or straight from the
+    feeds when background ingestion is disabled.
+    """
+    if not trends_app.INGEST_INTERVAL:
+        articles, _ = await feed_flight.do(hours_back, get_articles_from_feeds, trends_app.RSS_FEEDS, hours_back=hours_back)
+        return articles
+    # The ingestor is a thread; starting it, and waiting out a cold start, must not block the loop
+    await asyncio.to_thread(trends_app.feed_ingestor.ensure_running)
+    return await asyncio.to_thread(trends_app.article_store.query, hours_back)
+
+# --- Groq ---
+async def call_groq_api(system_prompt, user_prompt, max_retries=3):
+    """
+    Awaitable counterpart of app.call_groq_api_http. Retry decisions come
+    from app.groq_attempt_outcome; only the HTTP client and the sleeps
+    differ, and the response cache and quota store are used off the loop.
+    """
+    if trends_app.groq_api_key_missing():
+        return None
+
+    cache_key = trends_app.groq_cache_key(system_prompt, user_prompt)
+    cached_response = await asyncio.to_thread(trends_app.cached_groq_response, cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    headers, payload, request_tokens = trends_app.build_groq_request(system_prompt, user_prompt)
+
+    for attempt in range(max_retries):
+        if not await asyncio.to_thread(trends_app.groq_circuit_allows):
+            return None
+
+        started = time.monotonic()
+        response = error = None
+        error_kind = "error"
+        try:
+            delay = await asyncio.to_thread(trends_app.groq_limiter.reserve, request_tokens)
+            trends_app.GROQ_WAIT_SECONDS.labels(reason="quota").observe(delay)
+            if delay > 0:
+                logger.info(f"Groq quota: waiting {delay:.1f} seconds before next call")
+                await asyncio.sleep(delay)
+            started = time.monotonic()
+            response = await groq_client.post(trends_app.GROQ_API_URL, headers=headers, json=payload, timeout=60)
+        except httpx.TimeoutException as e:
+            error, error_kind = e, "timeout"
+        except httpx.HTTPError as e:
+            error, error_kind = e, "request_error"
+        except Exception as e:
+            error = e
+
+        result, wait = await asyncio.to_thread(
+            trends_app.groq_attempt_outcome, attempt, max_retries, started, cache_key, response, error, error_kind
+        )
+        if wait is None:
+            return result
+        await asyncio.sleep(wait)
+
+    logger.error("All retries failed.")
+    return None
+
+async def analyze_batch(batch):
+    async with groq_slots:
+        started = time.monotonic()
+        trends = trends_app.parse_batch_response(await call_groq_api(*trends_app.build_batch_prompt(batch)))
+    outcome = "ok" if trends is not None else "failed"
+    trends_app.GROQ_BATCH_SECONDS.labels(outcome=outcome).observe(time.monotonic() - started)
+    return trends
+
+async def iter_batch_analysis(batches):
+    """
+    Analyzes batches concurrently, yielding (index, batch, trends) as each
+    batch completes.
+    """
+    logger.info(f"Dispatching {len(batches)} batches to Groq")
+
+    async def run(index, batch):
+        try:
+            trends = await analyze_batch(batch)
+        except Exception as e:
+            logger.error(f"Batch {index + 1} failed: {e}")
+            trends = None
+        return index, batch, trends
+
+    tasks = [asyncio.ensure_future(run(index, batch)) for index, batch in enumerate(batches)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, batch, trends = await next_done
+            logger.info(f"Finished Batch {index + 1} of {len(batches)}")
+            yield index, batch, trends
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def analyze_articles_in_batches(articles, batch_size=trends_app.BATCH_MAX_ARTICLES, progress=None):
+    batches = trends_app.pack_batches(articles, max_articles=batch_size)
+    results = []
+    async for index, batch, trends in iter_batch_analysis(batches):
+        results.append((index, batch, trends))
+        if progress is not None:
+            progress("batch", trends_app.batch_progress_event(index, len(batches), batch, trends))
+    return trends_app.merge_batch_trends(results)
+
+async def analyze_articles_incrementally(articles, batch_size=trends_app.BATCH_MAX_ARTICLES, progress=None):
+    fresh = await asyncio.to_thread(trends_app.unanalyzed_articles, articles)
+    if fresh:
+        batches = trends_app.pack_batches(fresh, max_articles=batch_size)
+        async for index, batch, trends in iter_batch_analysis(batches):
+            if trends is not None:
+                await asyncio.to_thread(trends_app.record_batch_analysis, batch, trends)
+            if progress is not None:
+                progress("batch", trends_app.batch_progress_event(index, len(batches), batch, trends))
+
+    return await asyncio.to_thread(trends_app.group_recorded_trends, articles)
+
+async def consolidate_trends(trends_list):
+    if not trends_list:
+        return None
+
+    logger.info("Consolidating all trends for final report with Groq")
+    return trends_app.parse_consolidation_response(await call_groq_api(*trends_app.build_consolidation_prompt(trends_list)))
+
+# --- Pipeline ---
+async def build_trends_report(articles, batch_size=trends_app.BATCH_MAX_ARTICLES, progress=None):
+    with trends_app.TRENDS_STAGE_SECONDS.labels(stage="analysis").time():
+        if trends_app.INCREMENTAL_ANALYSIS:
+            preliminary_trends = await analyze_articles_incrementally(articles, batch_size=batch_size, progress=progress)
+        else:
+            preliminary_trends = await analyze_articles_in_batches(articles, batch_size=batch_size, progress=progress)
+    with trends_app.TRENDS_STAGE_SECONDS.labels(stage="consolidation").time():
+        final_trends = await consolidate_trends(preliminary_trends)
+    with trends_app.TRENDS_STAGE_SECONDS.labels(stage="enrich").time():
+        # Title matching is CPU-bound, keep it off the event loop
+        return await asyncio.to_thread(trends_app.enrich_trends, final_trends, articles)
+
+async def compute_trends(cache_key, articles, batch_size, progress=None):
+    enhanced_trends = trends_app.trends_cache.get(cache_key)
+    if enhanced_trends is None:
+        enhanced_trends = await build_trends_report(articles, batch_size=batch_size, progress=progress)
+        trends_app.store_trends_report(cache_key, enhanced_trends)
+    return enhanced_trends
+
+async def get_trends_payload(hours_back, batch_size, progress=None):
+    """
+    Builds the /trends response body; progress works as in app.get_trends_payload.
+    """
+    with trends_app.TRENDS_STAGE_SECONDS.labels(stage="articles").time():
+        articles = await get_recent_articles(hours_back)
+    # Deduplication and ranking are CPU-bound, keep them off the event loop
+    with trends_app.TRENDS_STAGE_SECONDS.labels(stage="prepare").time():
+        articles, stats, message = await asyncio.to_thread(trends_app.prepare_trends_articles, articles)
+    if message:
+        return trends_app.empty_trends_payload(message, stats)
+
+    if progress is not None:
+        progress("articles", {"hours_back": hours_back, "articles_analyzed": len(articles)})
+
+    cache_key = (hours_back, batch_size, trends_app.article_fingerprint(articles))
+    enhanced_trends = trends_app.trends_cache.get(cache_key)
+    if enhanced_trends is not None:
+        return trends_app.finish_trends_payload(hours_back, batch_size, articles, stats, enhanced_trends, cached=True)
+    if await asyncio.to_thread(trends_app.groq_breaker.is_open):
+        return await asyncio.to_thread(trends_app.degraded_trends_payload, hours_back, batch_size, articles, stats)
+    enhanced_trends, coalesced = await trends_flight.do(cache_key, compute_trends, cache_key, articles, batch_size, progress)
+    # May fall back to the degraded answer, which reads stored per-article results
+    return await asyncio.to_thread(
+        trends_app.finish_trends_payload, hours_back, batch_size, articles, stats, enhanced_trends, coalesced=coalesced
+    )
+
+async def run_trends_job(job):
+    async with job_slots:
+        job['status'] = "running"
+        job['started_at'] = datetime.now().isoformat()
+        await asyncio.to_thread(trends_app.trends_jobs.save, job)
+        try:
+            job['result'] = await get_trends_payload(job['hours_back'], job['batch_size'])
+            job['status'] = "done"
+        except Exception as e:
+            logger.error(f"Trends job {job['job_id']} failed: {e}")
+            job['error'] = str(e)
+            job['status'] = "failed"
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+            await asyncio.to_thread(trends_app.trends_jobs.save, job)
+
+async def stream_trends_events(hours_back, batch_size):
+    """
+    Yields pipeline progress as Server-Sent Events, like app.stream_trends_events.
+    """
+    events = asyncio.Queue()
+
+    async def run():
+        try:
+            payload = await get_trends_payload(hours_back, batch_size, progress=lambda event, data: events.put_nowait((event, data)))
+            events.put_nowait(("report", payload))
+        except Exception as e:
+            logger.error(f"Error in trends stream: {e}")
+            events.put_nowait(("error", {"success": False, "error": str(e), "timestamp": datetime.now().isoformat()}))
+        finally:
+            events.put_nowait(None)
+
+    # Runs to completion even if the client goes away, so the report still lands in the cache
+    spawn(run())
+
+    while True:
+        try:
+            item = await asyncio.wait_for(events.get(), trends_app.SSE_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            # SSE comment line; keeps proxies from closing an idle stream
+            yield ": keep-alive\n\n"
+            continue
+        if item is None:
+            break
+        yield trends_app.format_sse(*item)
+
+# --- API Routes ---
+def rate_limit(max_requests=10, per_minutes=60, scope=None):
+    """
+    app.rate_limit for async handlers. Keys use the scope or handler name as
+    app.rate_limit does, so both serving modes share limits when the backend
+    is shared.
+    """
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(request):
+            key = f"{scope or f.__name__}:{request.client.host if request.client else None}"
+            rejection = await asyncio.to_thread(trends_app.rate_limit_check, key, f.__name__, max_requests, per_minutes)
+            if rejection is not None:
+                body, headers = rejection
+                return JSONResponse(body, status_code=429, headers=headers)
+
+            return await f(request)
+        return decorated_function
+    return decorator
+
+# One per-client budget for every endpoint that starts the Groq pipeline, as in app.py
+trends_rate_limit = rate_limit(max_requests=2, per_minutes=60, scope="trends")
+
+def int_arg(request, name, default, low, high):
+    """Integer query parameter clamped to [low, high]; default when missing or malformed."""
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        value = default
+    return min(max(value, low), high)
+
+def error_response(e, status_code=500):
+    return JSONResponse({
+        "success": False,
+        "error": str(e),
+        "timestamp": datetime.now().isoformat()
+    }, status_code=status_code)
+
+async def home(request):
+    """Health check endpoint"""
+    return JSONResponse({
+        "message": "India-US News Trends API",
+        "version": "1.0",
+        "status": "active",
+        "endpoints": trends_app.API_ENDPOINTS
+    })
+
+async def health_check(request):
+    """Health check endpoint"""
+    return JSONResponse(await asyncio.to_thread(trends_app.health_payload))
+
+async def stats(request):
+    """Cache and request coalescing counters for this worker process"""
+    return JSONResponse({
+        "pid": os.getpid(),
+        "server": "asgi",
+        "trends_cache": {"entries": len(trends_app.trends_cache)},
+        "trends_singleflight": trends_flight.stats(),
+        "feed_singleflight": feed_flight.stats(),
+        "background_tasks": len(background_tasks),
+        "groq_circuit": await asyncio.to_thread(trends_app.groq_breaker.stats),
+        "llm_cache": trends_app.llm_cache.stats() if trends_app.llm_cache is not None else None,
+        "rate_limit": await asyncio.to_thread(trends_app.rate_limit_backend.stats),
+        "timestamp": datetime.now().isoformat()
+    })
+
+async def metrics(request):
+    """Prometheus metrics for the trends pipeline"""
+    return Response(await asyncio.to_thread(trends_app.metrics_payload), headers={"Content-Type": trends_app.CONTENT_TYPE_LATEST})
+
+@rate_limit(max_requests=5, per_minutes=10)
+async def get_articles(request):
+    """Get recent articles from RSS feeds"""
+    try:
+        hours_back = int_arg(request, 'hours', 72, 1, 168)
+        articles = await get_recent_articles(hours_back)
+
+        return JSONResponse({
+            "success": True,
+            "count": len(articles),
+            "hours_back": hours_back,
+            "articles": articles,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_articles: {e}")
+        return error_response(e)
+
+@trends_rate_limit
+async def get_trends(request):
+    """Get trending India-US news topics"""
+    try:
+        hours_back = int_arg(request, 'hours', 72, 1, 168)
+        batch_size = int_arg(request, 'batch_size', trends_app.BATCH_MAX_ARTICLES, 5, trends_app.BATCH_MAX_ARTICLES)
+        return JSONResponse(await get_trends_payload(hours_back, batch_size))
+
+    except Exception as e:
+        logger.error(f"Error in get_trends: {e}")
+        return error_response(e)
+
+@trends_rate_limit
+async def stream_trends(request):
+    """Stream trends analysis progress as Server-Sent Events"""
+    hours_back = int_arg(request, 'hours', 72, 1, 168)
+    batch_size = int_arg(request, 'batch_size', trends_app.BATCH_MAX_ARTICLES, 5, trends_app.BATCH_MAX_ARTICLES)
+
+    return StreamingResponse(
+        stream_trends_events(hours_back, batch_size),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@trends_rate_limit
+async def submit_trends_job(request):
+    """Queue a trends analysis and return a job id immediately"""
+    try:
+        hours_back = int_arg(request, 'hours', 72, 1, 168)
+        batch_size = int_arg(request, 'batch_size', trends_app.BATCH_MAX_ARTICLES, 5, trends_app.BATCH_MAX_ARTICLES)
+        # The job store is SQLite; keep its writes, like every other blocking call, off the event loop
+        job = await asyncio.to_thread(trends_app.new_trends_job, hours_back, batch_size)
+        queued = dict(job)
+        spawn(run_trends_job(job))
+
+        return JSONResponse({
+            "success": True,
+            "job_id": queued['job_id'],
+            "status": queued['status'],
+            "status_url": f"/trends/jobs/{queued['job_id']}",
+            "timestamp": datetime.now().isoformat()
+        }, status_code=202)
+
+    except Exception as e:
+        logger.error(f"Error in submit_trends_job: {e}")
+        return error_response(e)
+
+async def get_trends_job(request):
+    """Get the status, and once finished the result, of a trends job"""
+    job = await asyncio.to_thread(trends_app.trends_jobs.get, request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({
+            "success": False,
+            "error": "Job not found",
+            "message": "Unknown job id, or the job has expired",
+            "timestamp": datetime.now().isoformat()
+        }, status_code=404)
+
+    return JSONResponse({
+        "success": job['status'] not in ("failed", "lost"),
+        **job,
+        "timestamp": datetime.now().isoformat()
+    })
+
+async def not_found(request, exc):
+    return JSONResponse({
+        "success": False,
+        "error": "Endpoint not found",
+        "available_endpoints": ["/", "/health", "/stats", "/metrics", "/articles", "/trends", "/trends/stream", "/trends/jobs"]
+    }, status_code=404)
+
+async def internal_error(request, exc):
+    return JSONResponse({
+        "success": False,
+        "error": "Internal server error",
+        "message": "Please try again later"
+    }, status_code=500)
+
+@asynccontextmanager
+async def lifespan(_):
+    global feed_client, groq_client
+    # No connection cap: httpx's default of 100 would queue requests behind
+    # each other, and concurrency is already bounded by the feed deadline and
+    # groq_slots
+    feed_client = httpx.AsyncClient(
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=trends_app.FEED_FETCH_WORKERS)
+    )
+    groq_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=trends_app.GROQ_POOL_SIZE)
+    )
+    try:
+        yield
+    finally:
+        await feed_client.aclose()
+        await groq_client.aclose()
+
+app = Starlette(
+    routes=[
+        Route('/', home, methods=['GET']),
+        Route('/health', health_check, methods=['GET']),
+        Route('/stats', stats, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/articles', get_articles, methods=['GET']),
+        Route('/trends', get_trends, methods=['GET']),
+        Route('/trends/stream', stream_trends, methods=['GET']),
+        Route('/trends/jobs', submit_trends_job, methods=['POST']),
+        Route('/trends/jobs/{job_id}', get_trends_job, methods=['GET']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    exception_handlers={404: not_found, 500: internal_error},
+    lifespan=lifespan
+)
@@ -0,0 +1,803 @@
+"""
+Local benchmarks for the trends API.
+
+Everything runs against stub servers on localhost, with mock_groq.py
+standing in for Groq, so no network access or Groq key is needed.
+
+    python bench.py feeds --latency 0.3,0.8,1.5 --runs 3
+    python bench.py batches --articles 30 --llm-latency 2.5
+    python bench.py titles --articles 5000 --queries 2000
+    python bench.py serve --concurrency 64 --requests 128 --sync-threads 8,64
+    python bench.py serve --llm-latency lognormal:1.0,0.4 --llm-tpm 30000 --llm-rpm 30
+    python bench.py record --fixtures fixtures/replay
+    python bench.py replay --fixtures fixtures/replay --requests 20 --llm-latency 0.8 --rate-429 0.05
+
+record captures the configured feeds and the Groq responses for one real
+/trends run (this one needs network access and a Groq key); record
+--synthetic writes generated feeds instead. replay serves those fixtures
+from a local stub and reports end-to-end latency percentiles, LLM calls per
+request and the server's peak RSS.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import feedparser
+import httpx
+import requests
+
+import mock_groq
+
+import app
+
+
+# --- Stub servers ---
+def build_rss(feed_id, items=20):
+    """
+    Builds an RSS 2.0 document with items published over the last few hours.
+    """
+    now = datetime.now().astimezone()
+    entries = []
+    for i in range(items):
+        published = format_datetime(now - timedelta(minutes=15 * i))
+        entries.append(
+            f"<item><title>Feed {feed_id} story {i}: India and US talks</title>"
+            f"<link>http://stub.local/{feed_id}/{i}</link>"
+            f"<description>Summary of story {i} from feed {feed_id}.</description>"
+            f"<pubDate>{published}</pubDate></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>Stub feed {feed_id}</title><link>http://stub.local/{feed_id}</link>"
+        f"{''.join(entries)}</channel></rss>"
+    ).encode("utf-8")
+
+class StubFeedHandler(BaseHTTPRequestHandler):
+    """Serves /feed/<n>, sleeping for the latency configured for feed n."""
+    latencies = []
+
+    def do_GET(self):
+        try:
+            feed_id = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+            latency = self.latencies[feed_id]
+        except (ValueError, IndexError):
+            self.send_error(404)
+            return
+
+        time.sleep(latency)
+        body = build_rss(feed_id)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under load-test bursts
+    request_queue_size = 1024
+
+def start_server(handler):
+    """Starts handler on a free localhost port and returns (server, base_url)."""
+    server = StubServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# --- Benchmarks ---
+def fetch_sequential(feed_urls):
+    """The pre-concurrency fetch loop: one blocking feedparser.parse per feed."""
+    count = 0
+    for url in feed_urls:
+        feed = feedparser.parse(url, agent=app.FEED_USER_AGENT)
+        count += len(feed.entries)
+    return count
+
+def time_runs(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def bench_feeds(args):
+    latencies = [float(value) for value in args.latency.split(",")]
+    StubFeedHandler.latencies = latencies
+    server, base_url = start_server(StubFeedHandler)
+    feed_urls = [f"{base_url}/feed/{i}" for i in range(len(latencies))]
+
+    print(f"{len(feed_urls)} stub feeds, injected latency {latencies}s")
+    print(f"  expected sequential ~{sum(latencies):.2f}s, concurrent ~{max(latencies):.2f}s")
+
+    results = {
+        "sequential": time_runs(lambda: fetch_sequential(feed_urls), args.runs),
+        "concurrent": time_runs(lambda: app.get_articles_from_feeds(feed_urls, hours_back=72), args.runs),
+    }
+    for name, timings in results.items():
+        print(f"  {name:<11} median {statistics.median(timings):.3f}s  max {max(timings):.3f}s")
+
+    server.shutdown()
+
+class SimulatedClock:
+    """
+    Virtual clock shared by the threads of one simulated run.
+
+    sleep() blocks the calling thread until the clock reaches its wake time.
+    The clock jumps to the earliest wake time once every thread that has
+    work is asleep: tasks submitted to a SimulatedExecutor count as having
+    work, up to the executor's worker count, until they finish, and so does
+    each hold() until its release().
+    """
+
+    def __init__(self, workers):
+        self.now = 0.0
+        self.workers = workers
+        self.outstanding = 0
+        self.holds = 0
+        self._wakes = []
+        self._cond = threading.Condition()
+
+    def __call__(self):
+        return self.now
+
+    def _advance(self):
+        if self._wakes and len(self._wakes) >= min(self.outstanding, self.workers) + self.holds:
+            self.now = max(self.now, min(self._wakes))
+            self._cond.notify_all()
+
+    def hold(self):
+        with self._cond:
+            self.holds += 1
+
+    def release(self):
+        with self._cond:
+            self.holds -= 1
+            self._advance()
+
+    def add_task(self):
+        with self._cond:
+            self.outstanding += 1
+
+    def finish_task(self):
+        with self._cond:
+            self.outstanding -= 1
+            self._advance()
+
+    def sleep(self, seconds):
+        with self._cond:
+            wake = self.now + seconds
+            self._wakes.append(wake)
+            self._advance()
+            while self.now < wake:
+                self._cond.wait()
+            self._wakes.remove(wake)
+
+class SimulatedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks keep a SimulatedClock from advancing until they sleep or finish."""
+
+    def __init__(self, clock):
+        super().__init__(max_workers=clock.workers)
+        self.clock = clock
+
+    def submit(self, fn, *args, **kwargs):
+        self.clock.add_task()
+
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.clock.finish_task()
+
+        return super().submit(run)
+
+def synthetic_articles(count):
+    return [
+        {
+            "title": f"India and US officials discuss trade item {i}",
+            "link": f"http://stub.local/article/{i}",
+            "summary": "Delegations met to discuss tariffs, visas and defence cooperation. " * 3,
+            "published": datetime.now().isoformat(),
+            "source": "Stub",
+        }
+        for i in range(count)
+    ]
+
+def simulate_fixed_pause(batch_count, llm_latency, pause=20):
+    """Wall time of the old loop: sequential batches with a fixed pause, then consolidation."""
+    return batch_count * llm_latency + (batch_count - 1) * pause + llm_latency
+
+def simulate_limited(batches, llm_latency, rpm, tpm, concurrency):
+    """
+    Wall time of the real dispatch path on a simulated clock: the batches go
+    through app.iter_batch_analysis on a concurrency-worker groq_executor,
+    then consolidate_trends runs on the results. call_groq_api_http is
+    swapped for a stub that waits on a fresh GroqRateLimiter and then sleeps
+    llm_latency seconds.
+    """
+    clock = SimulatedClock(concurrency)
+    limiter = app.GroqRateLimiter(rpm, tpm, clock=clock, sleep=clock.sleep)
+
+    def call_groq_api(system_prompt, user_prompt, max_retries=3):
+        limiter.acquire(app.build_groq_request(system_prompt, user_prompt)[2])
+        clock.sleep(llm_latency)
+        return mock_groq.complete(system_prompt, user_prompt)
+
+    def dispatched(futures):
+        # iter_batch_analysis waits here once every batch is submitted; until
+        # then the clock must not run ahead of batches not yet submitted
+        clock.release()
+        return as_completed(futures)
+
+    executor = SimulatedExecutor(clock)
+    saved = app.call_groq_api_http, app.groq_executor, app.as_completed
+    app.call_groq_api_http, app.groq_executor, app.as_completed = call_groq_api, executor, dispatched
+    try:
+        clock.hold()
+        trends = [trend for _, _, batch_trends in app.iter_batch_analysis(batches) for trend in batch_trends or []]
+        # consolidation runs once every batch is back
+        executor.submit(app.consolidate_trends, trends).result()
+    finally:
+        app.call_groq_api_http, app.groq_executor, app.as_completed = saved
+        executor.shutdown()
+    return clock.now
+
+def bench_batches(args):
+    app.logger.setLevel(logging.WARNING)
+    articles = synthetic_articles(args.articles)
+    batches = app.pack_batches(articles, max_articles=args.batch_size)
+
+    print(f"{args.articles} articles in {len(batches)} batches of at most {args.batch_size}, "
+          f"simulated LLM latency {args.llm_latency}s")
+    print(f"  fixed 20s pause:              {simulate_fixed_pause(len(batches), args.llm_latency):7.1f}s")
+    for rpm, tpm in [(args.rpm, args.tpm), (args.rpm, 2000), (2, args.tpm)]:
+        total = simulate_limited(batches, args.llm_latency, rpm, tpm, args.concurrency)
+        print(f"  limiter rpm={rpm:<3} tpm={tpm:<6}  {total:7.1f}s")
+
+TITLE_WORDS = (
+    "India US trade talks tariff visa defence pact Modi Biden Trump Washington Delhi summit oil rupee "
+    "China Quad drones jet engines students H-1B pharma tech semiconductors deal sanctions Russia "
+    "elections markets investment climate energy nuclear space cricket monsoon border"
+).split()
+
+def paraphrase(title, rng):
+    """Mimics how an LLM echoes a title: dropped words, changed case and punctuation."""
+    words = title.split()
+    if len(words) > 4:
+        del words[rng.randrange(len(words))]
+    text = " ".join(words)
+    return rng.choice([text, text.lower(), text.replace(" and ", ", "), f"{text}."])
+
+def bench_titles(args):
+    rng = random.Random(42)
+    # Common news vocabulary plus made-up proper nouns, so titles overlap the way real headlines do
+    names = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))).title()
+             for _ in range(args.articles // 2)]
+    articles = [
+        {
+            "title": " ".join(rng.choice(TITLE_WORDS if rng.random() < 0.7 else names) for _ in range(rng.randint(6, 12))),
+            "link": f"http://stub.local/{i}",
+        }
+        for i in range(args.articles)
+    ]
+    expected = [rng.randrange(args.articles) for _ in range(args.queries)]
+    queries = [paraphrase(articles[i]["title"], rng) for i in expected]
+
+    started = time.perf_counter()
+    matcher = app.TitleMatcher(articles)
+    built = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matches = matcher.match(queries)
+    matched = time.perf_counter() - started
+
+    exact = sum(1 for query in queries if query in matcher._exact)
+    correct = sum(1 for i, article in zip(expected, matches) if article is articles[i])
+    unmatched = sum(1 for article in matches if article is None)
+
+    print(f"{args.articles} article titles, {args.queries} paraphrased queries "
+          f"(threshold {app.TITLE_MATCH_THRESHOLD})")
+    print(f"  build matrix   {built * 1000:8.1f} ms  ({len(matcher.vocabulary)} n-grams)")
+    print(f"  match all      {matched * 1000:8.1f} ms  ({matched / args.queries * 1e6:.1f} us per title)")
+    print(f"  exact lookup would resolve {exact / args.queries:.1%}; "
+          f"matcher resolves {correct / args.queries:.1%} correctly, {unmatched / args.queries:.1%} unmatched")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def process_tree_usage(pid):
+    """(RSS in MiB, thread count) of pid and all its descendants, read from /proc."""
+    rss_kb = threads = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return rss_kb / 1024, threads
+
+def start_api_server(command, env, base_url, timeout=30):
+    """Runs command from this directory and waits until base_url/health answers."""
+    process = subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{command[2]} exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{command[2]} did not come up within {timeout} seconds")
+
+async def run_load(base_url, total, concurrency, params=None):
+    """
+    Sends total /trends requests, concurrency at a time, with params(i) as
+    the query of request i. By default each asks for a different lookback,
+    so none share a cache entry or a coalesced run.
+    Returns (wall seconds, successful request latencies, failures).
+    """
+    params = params or (lambda i: {"hours": 24 + i % 144})
+    latencies = []
+    failures = 0
+    slots = asyncio.Semaphore(concurrency)
+    # Idle connections are dropped before the servers' own keep-alive
+    # timeouts (gunicorn 2s, uvicorn 5s), so no request races a server close
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency, keepalive_expiry=1)
+
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        async def one(i):
+            nonlocal failures
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(f"{base_url}/trends", params=params(i))
+                    ok = response.status_code == 200 and response.json().get("trends_count", 0) > 0
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - started, latencies, failures
+
+def pipeline_env(groq_url, feed_urls, in_flight=1, **overrides):
+    """
+    Environment for an app server that fetches feeds and calls Groq on every
+    /trends request: caching, ingestion, quota pacing and rate limiting off,
+    thread pools sized for in_flight concurrent requests.
+    """
+    env = dict(
+        os.environ,
+        GROQ_API_KEY="stub",
+        GROQ_API_URL=f"{groq_url}/openai/v1/chat/completions",
+        GROQ_REQUESTS_PER_MINUTE="1000000",
+        GROQ_TOKENS_PER_MINUTE="100000000",
+        GROQ_QUOTA_DB_PATH="",
+        GROQ_MAX_CONCURRENCY=str(in_flight * 4),
+        FEED_FETCH_WORKERS=str(in_flight * len(feed_urls)),
+        RSS_FEEDS=",".join(feed_urls),
+        INGEST_INTERVAL="0",
+        TRENDS_CACHE_TTL="0",
+        INCREMENTAL_ANALYSIS="0",
+        LLM_CACHE_DIR="",
+        ARTICLE_ARCHIVE_PATH="",
+        RATE_LIMIT_BACKEND="none",
+    )
+    env.update(overrides)
+    return env
+
+def run_api_server(kind, env, threads=8):
+    """
+    Starts the sync app under gunicorn (one worker, threads threads) or the
+    async app under uvicorn on a free port. Returns (process, base_url).
+    """
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    if kind == "sync":
+        command = [sys.executable, "-m", "gunicorn", "-w", "1", "--threads", str(threads), "--timeout", "300",
+                   "-b", f"127.0.0.1:{port}", "app:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "--log-level", "warning", "--port", str(port), "asgi:app"]
+    return start_api_server(command, env, base_url), base_url
+
+class PeakUsage:
+    """Samples a process tree's RSS and thread count in the background, keeping the peaks."""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.rss = 0.0
+        self.threads = 0
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._done.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            rss, threads = process_tree_usage(self.pid)
+            self.rss, self.threads = max(self.rss, rss), max(self.threads, threads)
+
+def bench_serve(args):
+    StubFeedHandler.latencies = [args.feed_latency] * args.feeds
+    _, feeds_url = start_server(StubFeedHandler)
+
+    # Everything outside the serving model is made unlimited, so the sync app
+    # is bounded only by its request threads
+    sync_threads = [int(value) for value in args.sync_threads.split(",")]
+    feed_urls = [f"{feeds_url}/feed/{i}" for i in range(args.feeds)]
+    groq = mock_groq.start_mock_groq(latency=mock_groq.parse_latency(args.llm_latency), rpm=args.llm_rpm, tpm=args.llm_tpm)
+    env = pipeline_env(groq.base_url, feed_urls, in_flight=max([args.concurrency] + sync_threads))
+
+    servers = [(f"sync  gunicorn --threads {threads}", "sync", threads) for threads in sync_threads]
+    servers.append(("async uvicorn", "async", None))
+
+    print(f"{args.requests} /trends requests, {args.concurrency} concurrent; {args.feeds} stub feeds at "
+          f"{args.feed_latency}s, mock Groq at {args.llm_latency} per call (one worker process each)")
+    for name, kind, threads in servers:
+        process, base_url = run_api_server(kind, env, threads)
+        groq.counts.clear()
+        try:
+            with PeakUsage(process.pid) as peak:
+                wall, latencies, failures = asyncio.run(run_load(base_url, args.requests, args.concurrency))
+        finally:
+            process.terminate()
+            process.wait()
+
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float("nan")] * 99
+        print(f"  {name:<26} {len(latencies) / wall:6.1f} req/s  p50 {quantiles[49]:6.2f}s  p95 {quantiles[94]:6.2f}s  "
+              f"failed {failures:<3}  Groq 429s {groq.counts['rate_limited']:<4}  peak RSS {peak.rss:6.1f} MiB  "
+              f"peak threads {peak.threads}")
+
+# --- Record / replay ---
+RFC822_DATE = re.compile(r"(<pubDate>)([^<]+)(</pubDate>)")
+ISO_DATE = re.compile(r"(<(updated|published|dc:date)>)([^<]+)(</\2>)")
+
+def prompt_key(system_prompt, user_prompt):
+    return app.DiskCache.make_key(system_prompt, user_prompt)
+
+def shift_feed_dates(body, delta):
+    """
+    Moves every RSS pubDate and Atom updated/published date in a feed body
+    forward by delta, so recorded articles stay inside the lookback window.
+    """
+    # The dates are ASCII, and latin-1 round-trips whatever encoding the feed uses
+    text = body.decode("latin-1")
+
+    def shift_rfc822(match):
+        try:
+            shifted = format_datetime(parsedate_to_datetime(match.group(2).strip()) + delta)
+        except (TypeError, ValueError):
+            return match.group(0)
+        return f"{match.group(1)}{shifted}{match.group(3)}"
+
+    def shift_iso(match):
+        try:
+            shifted = (datetime.fromisoformat(match.group(3).strip()) + delta).isoformat()
+        except ValueError:
+            return match.group(0)
+        return f"{match.group(1)}{shifted}{match.group(4)}"
+
+    text = RFC822_DATE.sub(shift_rfc822, text)
+    text = ISO_DATE.sub(shift_iso, text)
+    return text.encode("latin-1")
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Serves recorded fixtures: GET /feed/<n> returns feed n, and POST
+    /openai/v1/chat/completions returns the completion recorded for the same
+    prompts, or mock_groq's answer when there is none.
+
+    Every response is delayed by its latency scaled by a random factor within
+    +/- jitter, and a rate_429 share of LLM calls gets a Groq-style 429
+    instead. When upstream is set (recording), LLM calls are forwarded there
+    and successful completions are kept.
+    """
+    feeds = []  # [(body, content type)]
+    completions = {}  # prompt key -> completion JSON
+    upstream = None
+    feed_latency = 0.0
+    llm_latency = 0.0
+    jitter = 0.0
+    rate_429 = 0.0
+    rng = random.Random(0)
+    counts = Counter()
+    lock = threading.Lock()
+
+    def _pause(self, latency):
+        if latency > 0:
+            with self.lock:
+                factor = 1 + self.rng.uniform(-self.jitter, self.jitter)
+            time.sleep(latency * factor)
+
+    def _send(self, status, body, content_type="application/json", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        try:
+            body, content_type = self.feeds[int(self.path.rstrip("/").rsplit("/", 1)[-1])]
+        except (ValueError, IndexError):
+            self.send_error(404)
+            return
+        self._pause(self.feed_latency)
+        self._send(200, body, content_type)
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        system_prompt, user_prompt = (message["content"] for message in json.loads(raw)["messages"])
+        key = prompt_key(system_prompt, user_prompt)
+
+        if self.upstream:
+            response = requests.post(self.upstream, data=raw, timeout=60, headers={
+                "Authorization": self.headers.get("Authorization", ""),
+                "Content-Type": "application/json"
+            })
+            with self.lock:
+                self.counts["upstream"] += 1
+                if response.status_code == 200:
+                    self.completions[key] = response.json()
+            retry_after = response.headers.get("Retry-After")
+            self._send(response.status_code, response.content, headers=[("Retry-After", retry_after)] if retry_after else ())
+            return
+
+        self._pause(self.llm_latency)
+        with self.lock:
+            self.counts["calls"] += 1
+            throttled = self.rng.random() < self.rate_429
+            completion = None if throttled else self.completions.get(key)
+            self.counts["429" if throttled else "replayed" if completion is not None else "fallback"] += 1
+
+        if throttled:
+            body = json.dumps({"error": {
+                "message": "Rate limit reached (injected by replay stub)",
+                "type": "tokens",
+                "code": "rate_limit_exceeded"
+            }}).encode("utf-8")
+            self._send(429, body, headers=[("Retry-After", "1")])
+            return
+
+        if completion is None:
+            content = json.dumps(mock_groq.complete(system_prompt, user_prompt))
+            completion = {"choices": [{"message": {"role": "assistant", "content": content}}]}
+        self._send(200, json.dumps(completion).encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+def write_fixtures(directory, feeds, recorded_at):
+    """Writes feed bodies and manifest.json. feeds is [(url, body, content type)]."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"recorded_at": recorded_at.isoformat(), "feeds": []}
+    for i, (url, body, content_type) in enumerate(feeds):
+        filename = f"feed-{i}.xml"
+        with open(os.path.join(directory, filename), "wb") as f:
+            f.write(body)
+        manifest["feeds"].append({"url": url, "file": filename, "content_type": content_type})
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def load_fixtures(directory):
+    """Returns (recorded_at, [(body, content type)], {prompt key: completion})."""
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    feeds = []
+    for feed in manifest["feeds"]:
+        with open(os.path.join(directory, feed["file"]), "rb") as f:
+            feeds.append((f.read(), feed["content_type"]))
+
+    completions = {}
+    llm_path = os.path.join(directory, "llm.jsonl")
+    if os.path.exists(llm_path):
+        with open(llm_path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    completions[entry["key"]] = entry["completion"]
+    return datetime.fromisoformat(manifest["recorded_at"]), feeds, completions
+
+def bench_record(args):
+    recorded_at = datetime.now(timezone.utc)
+    if args.synthetic:
+        feeds = [(f"synthetic:{i}", build_rss(i), "application/rss+xml; charset=utf-8") for i in range(args.synthetic)]
+    else:
+        feeds = []
+        for url in app.RSS_FEEDS:
+            try:
+                response = requests.get(url, headers={"User-Agent": app.FEED_USER_AGENT}, timeout=app.FEED_TIMEOUT)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"  skipping {url}: {e}")
+                continue
+            feeds.append((url, response.content, response.headers.get("Content-Type", "application/xml")))
+            print(f"  recorded {url} ({len(response.content)} bytes)")
+    write_fixtures(args.fixtures, feeds, recorded_at)
+    print(f"{len(feeds)} feeds written to {args.fixtures}")
+    if args.synthetic:
+        return
+
+    # Run the real pipeline once against the recorded feeds, capturing what Groq answers
+    ReplayHandler.feeds = [(body, content_type) for _, body, content_type in feeds]
+    ReplayHandler.upstream = app.GROQ_API_URL
+    _, stub_url = start_server(ReplayHandler)
+    env = pipeline_env(stub_url, [f"{stub_url}/feed/{i}" for i in range(len(feeds))],
+                       GROQ_API_KEY=app.GROQ_API_KEY,
+                       GROQ_REQUESTS_PER_MINUTE=str(app.GROQ_REQUESTS_PER_MINUTE),
+                       GROQ_TOKENS_PER_MINUTE=str(app.GROQ_TOKENS_PER_MINUTE))
+    process, base_url = run_api_server("sync", env)
+    try:
+        response = httpx.get(f"{base_url}/trends", params={"hours": args.hours}, timeout=600)
+        print(f"/trends returned {response.status_code} with {response.json().get('trends_count', 0)} trends")
+    finally:
+        process.terminate()
+        process.wait()
+
+    with open(os.path.join(args.fixtures, "llm.jsonl"), "w") as f:
+        for key, completion in ReplayHandler.completions.items():
+            f.write(json.dumps({"key": key, "completion": completion}) + "\n")
+    print(f"{len(ReplayHandler.completions)} LLM responses recorded from {ReplayHandler.counts['upstream']} calls")
+
+def bench_replay(args):
+    recorded_at, feeds, completions = load_fixtures(args.fixtures)
+    delta = datetime.now(timezone.utc) - recorded_at
+    ReplayHandler.feeds = [(shift_feed_dates(body, delta), content_type) for body, content_type in feeds]
+    ReplayHandler.completions = completions
+    ReplayHandler.feed_latency = args.feed_latency
+    ReplayHandler.llm_latency = args.llm_latency
+    ReplayHandler.jitter = args.jitter
+    ReplayHandler.rate_429 = args.rate_429
+    ReplayHandler.rng = random.Random(args.seed)
+    _, stub_url = start_server(ReplayHandler)
+
+    env = pipeline_env(stub_url, [f"{stub_url}/feed/{i}" for i in range(len(feeds))], in_flight=args.concurrency)
+    process, base_url = run_api_server(args.server, env, threads=max(8, args.concurrency))
+    try:
+        with PeakUsage(process.pid) as peak:
+            wall, latencies, failures = asyncio.run(
+                run_load(base_url, args.requests, args.concurrency, params=lambda i: {"hours": args.hours})
+            )
+    finally:
+        process.terminate()
+        process.wait()
+
+    counts = ReplayHandler.counts
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else [float("nan")] * 99
+    results = {
+        "server": args.server,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "failures": failures,
+        "wall_seconds": round(wall, 3),
+        "latency_seconds": {
+            "p50": round(quantiles[49], 3),
+            "p95": round(quantiles[94], 3),
+            "p99": round(quantiles[98], 3),
+            "max": round(max(latencies), 3) if latencies else None
+        },
+        "llm_calls_per_request": round(counts["calls"] / args.requests, 2),
+        "llm_calls": dict(counts),
+        "peak_rss_mib": round(peak.rss, 1),
+        "peak_threads": peak.threads
+    }
+
+    print(f"{args.requests} /trends requests ({args.concurrency} concurrent, {args.server} server) replaying "
+          f"{len(feeds)} feeds and {len(completions)} LLM responses recorded {recorded_at:%Y-%m-%d %H:%M} UTC")
+    print(f"  latency    p50 {quantiles[49]:6.2f}s  p95 {quantiles[94]:6.2f}s  p99 {quantiles[98]:6.2f}s  "
+          f"failed {failures}")
+    print(f"  LLM calls  {results['llm_calls_per_request']} per request  ({counts['replayed']} replayed, "
+          f"{counts['fallback']} unrecorded, {counts['429']} injected 429s)")
+    print(f"  server     peak RSS {peak.rss:.1f} MiB, peak threads {peak.threads}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    feeds = subparsers.add_parser("feeds", help="Sequential vs concurrent feed fetching")
+    feeds.add_argument("--latency", default="0.3,0.5,0.8,1.0,1.2,1.5",
+                       help="Comma-separated injected latency per stub feed, in seconds")
+    feeds.add_argument("--runs", type=int, default=3)
+    feeds.set_defaults(func=bench_feeds)
+
+    batches = subparsers.add_parser("batches", help="Fixed-pause vs rate-limited batch dispatch (simulated clock)")
+    batches.add_argument("--articles", type=int, default=30)
+    batches.add_argument("--batch-size", type=int, default=app.BATCH_MAX_ARTICLES)
+    batches.add_argument("--llm-latency", type=float, default=2.5)
+    batches.add_argument("--rpm", type=int, default=app.GROQ_REQUESTS_PER_MINUTE)
+    batches.add_argument("--tpm", type=int, default=app.GROQ_TOKENS_PER_MINUTE)
+    batches.add_argument("--concurrency", type=int, default=app.GROQ_MAX_CONCURRENCY)
+    batches.set_defaults(func=bench_batches)
+
+    titles = subparsers.add_parser("titles", help="Fuzzy matching of LLM-returned titles to articles")
+    titles.add_argument("--articles", type=int, default=5000)
+    titles.add_argument("--queries", type=int, default=2000)
+    titles.set_defaults(func=bench_titles)
+
+    serve = subparsers.add_parser("serve", help="Load test of /trends: sync gunicorn vs async uvicorn")
+    serve.add_argument("--requests", type=int, default=128)
+    serve.add_argument("--concurrency", type=int, default=64)
+    serve.add_argument("--sync-threads", default="8,64",
+                       help="Comma-separated gunicorn thread counts to compare against")
+    serve.add_argument("--feeds", type=int, default=3)
+    serve.add_argument("--feed-latency", type=float, default=0.2)
+    serve.add_argument("--llm-latency", default="1.0",
+                       help="Mock Groq latency distribution, e.g. 1.0 or lognormal:1.0,0.4")
+    serve.add_argument("--llm-rpm", type=int, default=0, help="Mock Groq requests per minute (0 for unlimited)")
+    serve.add_argument("--llm-tpm", type=int, default=0, help="Mock Groq tokens per minute (0 for unlimited)")
+    serve.set_defaults(func=bench_serve)
+
+    record = subparsers.add_parser("record", help="Capture feeds and Groq responses as replay fixtures")
+    record.add_argument("--fixtures", default="fixtures/replay")
+    record.add_argument("--hours", type=int, default=72)
+    record.add_argument("--synthetic", type=int, default=0, metavar="FEEDS",
+                        help="Write this many generated feeds instead of recording anything")
+    record.set_defaults(func=bench_record)
+
+    replay = subparsers.add_parser("replay", help="End-to-end /trends benchmark against recorded fixtures")
+    replay.add_argument("--fixtures", default="fixtures/replay")
+    replay.add_argument("--server", choices=["sync", "async"], default="sync")
+    replay.add_argument("--requests", type=int, default=20)
+    replay.add_argument("--concurrency", type=int, default=1)
+    replay.add_argument("--hours", type=int, default=72)
+    replay.add_argument("--feed-latency", type=float, default=0.2)
+    replay.add_argument("--llm-latency", type=float, default=0.8)
+    replay.add_argument("--jitter", type=float, default=0.25, help="Latency varies by up to this fraction either way")
+    replay.add_argument("--rate-429", type=float, default=0.0,
+                        help="Share of LLM calls answered with 429 (each costs the app's 30s+ backoff)")
+    replay.add_argument("--seed", type=int, default=1)
+    replay.add_argument("--output", help="Also write the results as JSON to this path")
+    replay.set_defaults(func=bench_replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
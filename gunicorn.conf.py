@@ -0,0 +1,38 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn is started from
+this directory.
+
+/metrics runs in Prometheus multiprocess mode: each worker writes its samples
+to files in PROMETHEUS_MULTIPROC_DIR and a scrape of any worker aggregates
+them all. Left unset, every master gets a private temporary directory,
+removed again on exit. A directory set by the operator is kept, and only its
+*.db sample files from a previous run are deleted at startup. Set it to an
+empty string to turn multiprocess mode off.
+"""
+import glob
+import os
+import shutil
+import tempfile
+
+# Set before the workers import app.py, which is when prometheus_client reads it
+private_metrics_dir = None
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    private_metrics_dir = tempfile.mkdtemp(prefix='trends-api-metrics-')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = private_metrics_dir
+
+def on_starting(server):
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        os.remove(path)
+
+def on_exit(server):
+    if private_metrics_dir:
+        shutil.rmtree(private_metrics_dir, ignore_errors=True)
+
+def child_exit(server, worker):
+    if os.environ['PROMETHEUS_MULTIPROC_DIR']:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,321 @@
+"""
+Local stand-in for the Groq chat completions API, for load testing the
+trends API on one machine with no network access or Groq key.
+
+    python mock_groq.py --port 8090 --latency lognormal:0.8,0.5 --tpm 30000 --rpm 30
+    GROQ_API_URL=http://127.0.0.1:8090/openai/v1/chat/completions GROQ_API_KEY=mock gunicorn app:app
+
+It speaks the OpenAI-compatible protocol Groq does: POST
+/openai/v1/chat/completions with a bearer token (any value) answers with a
+chat.completion whose content is deterministic JSON in the shape the prompt
+asks for, a 'trends' array for batch prompts or a 'report' array for the
+consolidation prompt. Titles are grouped by their most common keyword, so
+the same articles always produce the same trends.
+
+Requests over the per-minute request or token quota get the 429 Groq sends,
+with retry-after and x-ratelimit-* headers; those headers are on successful
+responses too. Each response waits for a delay drawn from --latency, and
+--error-rate answers that share of calls with a 503. GET /stats returns
+counters for the calls seen so far.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+STOPWORDS = {
+    "about", "after", "again", "against", "amid", "and", "are", "before", "between", "but", "for", "from",
+    "has", "have", "india", "indian", "into", "its", "new", "news", "over", "says", "than", "that", "the",
+    "their", "this", "under", "united", "states", "usa", "with", "will"
+}
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z'-]{2,}")
+
+def parse_latency(spec):
+    """
+    Parses a latency distribution into a function of a random.Random that
+    returns seconds. Accepts a plain number, fixed:S, uniform:LOW,HIGH,
+    normal:MEAN,STDEV, lognormal:MEDIAN,SIGMA or exponential:MEAN.
+    """
+    name, _, params = spec.partition(":")
+    if not params:
+        name, params = "fixed", name
+    try:
+        values = [float(value) for value in params.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid latency parameters: {spec}")
+
+    distributions = {
+        "fixed": (1, lambda rng, seconds: seconds),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, stdev: max(0.0, rng.gauss(mean, stdev))),
+        "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean)),
+    }
+    if name not in distributions or len(values) != distributions[name][0]:
+        raise argparse.ArgumentTypeError(f"unknown latency distribution: {spec}")
+    if any(value < 0 for value in values) or (name in ("lognormal", "exponential") and values[0] == 0):
+        raise argparse.ArgumentTypeError(f"latency parameters out of range: {spec}")
+    sample = distributions[name][1]
+    return lambda rng: sample(rng, *values)
+
+def count_tokens(text):
+    """Rough token count: one per four characters, as OpenAI-style tokenizers average on English."""
+    return max(1, len(text) // 4)
+
+def format_reset(seconds):
+    """Formats a reset interval the way Groq's x-ratelimit-reset-* headers do, e.g. 7.66s or 2m59.56s."""
+    minutes, seconds = divmod(round(max(0.0, seconds), 2), 60)
+    return f"{int(minutes)}m{seconds:.2f}s" if minutes else f"{seconds:.2f}s"
+
+class MinuteQuota:
+    """
+    Requests- and tokens-per-minute limits over a sliding one-minute window.
+    A limit of 0 means unlimited.
+    """
+
+    def __init__(self, rpm=0, tpm=0, clock=time.monotonic):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.clock = clock
+        self.window = deque()  # (time, tokens) per admitted request
+        self.tokens = 0
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.window and self.window[0][0] <= now - 60:
+            self.tokens -= self.window.popleft()[1]
+
+    def _reset_after(self, now, tokens_needed):
+        """Seconds until enough requests in the window expire to free tokens_needed tokens."""
+        freed = 0
+        for admitted, tokens in self.window:
+            freed += tokens
+            if freed >= tokens_needed:
+                return admitted + 60 - now
+        return 0.0
+
+    def admit(self, tokens):
+        """
+        Charges a request of tokens against the quota if it fits. Returns
+        (admitted, which limit refused it or None, rate limit headers).
+        """
+        with self.lock:
+            now = self.clock()
+            self._expire(now)
+            over_requests = self.rpm and len(self.window) + 1 > self.rpm
+            over_tokens = self.tpm and self.tokens + tokens > self.tpm
+            refused = "requests" if over_requests else "tokens" if over_tokens else None
+            if refused is None:
+                self.window.append((now, tokens))
+                self.tokens += tokens
+
+            # Like Groq's, the reset headers give the time until the quota is fully replenished
+            full_reset = format_reset(self.window[-1][0] + 60 - now if self.window else 0)
+            headers = {}
+            if self.rpm:
+                headers["x-ratelimit-limit-requests"] = str(self.rpm)
+                headers["x-ratelimit-remaining-requests"] = str(max(0, self.rpm - len(self.window)))
+                headers["x-ratelimit-reset-requests"] = full_reset
+            if self.tpm:
+                headers["x-ratelimit-limit-tokens"] = str(self.tpm)
+                headers["x-ratelimit-remaining-tokens"] = str(max(0, self.tpm - self.tokens))
+                headers["x-ratelimit-reset-tokens"] = full_reset
+            if refused:
+                wait = self._reset_after(now, 1 if refused == "requests" else self.tokens - self.tpm + tokens)
+                headers["retry-after"] = str(max(1, math.ceil(wait)))
+            return refused is None, refused, headers
+
+def keywords(title):
+    return [word.lower() for word in WORD_PATTERN.findall(title) if word.lower() not in STOPWORDS]
+
+def group_titles(titles):
+    """
+    Groups titles by their most common keyword across all of them, ties going
+    to the alphabetically first. Returns [(keyword, [titles])], largest first.
+    """
+    frequency = Counter(word for title in titles for word in set(keywords(title)))
+    groups = {}
+    for title in titles:
+        words = keywords(title)
+        key = min(words, key=lambda word: (-frequency[word], word)) if words else "general"
+        groups.setdefault(key, []).append(title)
+    return sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
+
+def complete(system_prompt, user_prompt):
+    """The deterministic JSON answer for a trends batch or consolidation prompt."""
+    if "'report'" in system_prompt:
+        merged = {}
+        trend = None
+        for line in user_prompt.splitlines():
+            line = line.strip()
+            if line.startswith("Trend: "):
+                trend = merged.setdefault(line[len("Trend: "):].strip(), {})
+            elif line.startswith("- ") and trend is not None:
+                trend[line[2:].strip()] = None
+        ranked = sorted(merged.items(), key=lambda item: (-len(item[1]), item[0]))[:5]
+        return {"report": [
+            {
+                "trend_name": trend_name,
+                "explanation": f"{len(titles)} reports covering {trend_name.lower()}.",
+                "relevant_articles": list(titles)
+            }
+            for trend_name, titles in ranked
+        ]}
+
+    titles = [title.strip() for title in re.findall(r"^\s*Title: (.*)$", user_prompt, re.M)]
+    return {"trends": [
+        {"trend_name": f"India-US {keyword.title()}", "relevant_articles": group}
+        for keyword, group in group_titles(titles)
+    ]}
+
+class MockGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, error_type, code, headers=None):
+        self._send(status, {"error": {"message": message, "type": error_type, "code": code}}, headers)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.server.lock:
+                self._send(200, dict(self.server.counts))
+        elif self.path == "/openai/v1/models":
+            self._send(200, {"object": "list", "data": [{"id": self.server.model, "object": "model", "owned_by": "mock"}]})
+        else:
+            self._error(404, f"Unknown path {self.path}", "invalid_request_error", "unknown_url")
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != COMPLETIONS_PATH:
+            self._error(404, f"Unknown path {self.path}", "invalid_request_error", "unknown_url")
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._error(401, "Invalid API Key", "invalid_request_error", "invalid_api_key")
+            return
+        try:
+            payload = json.loads(raw)
+            messages = {message["role"]: message["content"] for message in payload["messages"]}
+        except (ValueError, KeyError, TypeError):
+            self._error(400, "Invalid request body", "invalid_request_error", "invalid_request")
+            return
+
+        server = self.server
+        system_prompt, user_prompt = messages.get("system", ""), messages.get("user", "")
+        content = json.dumps(complete(system_prompt, user_prompt))
+        prompt_tokens = count_tokens(system_prompt) + count_tokens(user_prompt)
+        completion_tokens = count_tokens(content)
+        model = payload.get("model", server.model)
+
+        admitted, refused, headers = server.quota.admit(prompt_tokens + completion_tokens)
+        with server.lock:
+            server.counts["requests"] += 1
+            failed = admitted and server.rng.random() < server.error_rate
+            delay = server.latency(server.rng)
+            server.counts["rate_limited" if not admitted else "errors" if failed else "completions"] += 1
+
+        if not admitted:
+            limit = server.quota.rpm if refused == "requests" else server.quota.tpm
+            abbreviation = "RPM" if refused == "requests" else "TPM"
+            self._error(429, (
+                f"Rate limit reached for model `{model}` on {refused} per minute ({abbreviation}): "
+                f"Limit {limit}. Please try again in {headers['retry-after']}s."
+            ), refused, "rate_limit_exceeded", headers)
+            return
+
+        time.sleep(delay)
+        if failed:
+            self._error(503, "Service Unavailable", "internal_server_error", "service_unavailable", headers)
+            return
+
+        self._send(200, {
+            "id": f"chatcmpl-{hashlib.sha256(content.encode('utf-8')).hexdigest()[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "total_time": round(delay, 3)
+            },
+            "x_groq": {"id": f"req_{uuid.uuid4().hex}"}
+        }, headers)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under load-test bursts
+    request_queue_size = 1024
+
+    def __init__(self, address, latency=None, rpm=0, tpm=0, error_rate=0.0, seed=0, model="llama3-8b-8192"):
+        super().__init__(address, MockGroqHandler)
+        self.latency = latency or parse_latency("0")
+        self.quota = MinuteQuota(rpm, tpm)
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.model = model
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def completions_url(self):
+        return f"{self.base_url}{COMPLETIONS_PATH}"
+
+def start_mock_groq(host="127.0.0.1", port=0, **options):
+    """Starts a MockGroqServer on a background thread and returns it."""
+    server = MockGroqServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=parse_latency, default="lognormal:0.8,0.4",
+                        help="Response delay distribution, e.g. 0.8, uniform:0.2,1.5 or lognormal:0.8,0.4")
+    parser.add_argument("--rpm", type=int, default=30, help="Requests per minute before 429s (0 for unlimited)")
+    parser.add_argument("--tpm", type=int, default=30000, help="Tokens per minute before 429s (0 for unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with a 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockGroqServer((args.host, args.port), latency=args.latency, rpm=args.rpm, tpm=args.tpm,
+                            error_rate=args.error_rate, seed=args.seed)
+    print(f"Mock Groq API at {server.completions_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()